@@ -0,0 +1,76 @@
+"""Admission control: a bounded number of concurrent searches behind a short, bounded queue."""
+import threading
+import time
+from typing import Any, Dict
+
+
+class AdmissionController:
+    """Caps concurrent searches and sheds load once the queue is full.
+
+    Up to ``max_active`` searches run at once. Up to ``max_queued`` more wait
+    at most ``queue_timeout`` seconds for a slot, in arrival order; anything
+    beyond is refused at once, so under a spike clients are told to back off
+    instead of every request timing out together. The controller is under
+    pressure, and callers should degrade, once any request is queued or
+    ``degrade_at`` of the slots are taken.
+    """
+
+    def __init__(self, max_active: int = 16, max_queued: int = 32, queue_timeout: float = 1.0, degrade_at: float = 0.75):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.degrade_at = degrade_at
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed; False when the search must be refused."""
+        with self._cond:
+            # Newcomers only skip the queue when nobody is waiting in it
+            if self.active < self.max_active and self.queued == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.queued >= self.max_queued:
+                self.rejected += 1
+                return False
+            self.queued += 1
+            try:
+                give_up_at = time.monotonic() + self.queue_timeout
+                while self.active >= self.max_active:
+                    remaining = give_up_at - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def under_pressure(self) -> bool:
+        """Whether searches should run in degraded mode right now."""
+        with self._cond:
+            return self.queued > 0 or self.active >= self.degrade_at * self.max_active
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "active": self.active,
+                "queued": self.queued,
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
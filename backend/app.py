@@ -1,203 +1,472 @@
 #imports
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g, has_request_context, stream_with_context
 from flask_cors import CORS
-import requests
 from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer, util
-import torch
 import numpy as np
-import re
 import urllib.parse
 import concurrent.futures
 import os
 from dotenv import load_dotenv
-from duckduckgo_search import DDGS
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 import hashlib
 import json
+import atexit
+import contextlib
+import threading
+from embedding_cache import EmbeddingCache
+from result_cache import ResultCache, STALE, MISS
+from http_pool import http_get, http_get_parsed, http_post, get_policy, deadline_scope, upstream_health, network_time, upstream_failures, enable_response_cache
+from http_cache import HTTPCache
+from health import HealthRegistry
+from metrics import Registry, StageTimings
+from fanout import FanoutEngine
+from dedupe import dedupe_indices, result_domain
+from local_index import LocalIndex
+from page_fetcher import PageFetcher
+from summarizer import split_sentences, mmr_select
+from lexical import bm25_scores
+from serialization import dumps, parse_fields, shape_payload, shape_results, choose_encoding, compress
+from singleflight import SingleFlight
+from admission import AdmissionController
+from pagination import SearchSessions, is_partial
+from prefetch import Prefetcher
+from encoders import load_encoder, DEFAULT_MODEL
+from embedding_service import MicroBatcher, RemoteEncoder, load_authkey
+import functools
+import time
 
 # Load environment variables
 load_dotenv()
 
 # Get API keys from environment
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
+NEWS_API_KEY = os.getenv('NEWS_API_KEY', 'bb4256541ca24dbda24d80e21d29bd51')
+
+# Upstream endpoints. Each can be overridden with <NAME>_URL, and UPSTREAM_BASE_URL
+# swaps the scheme and host of all of them at once, e.g. to point every source at
+# the mock server in mock_upstreams.py.
+UPSTREAM_BASE_URL = os.getenv('UPSTREAM_BASE_URL')
+
+def upstream_url(name: str, default: str) -> str:
+    """Resolve an upstream endpoint from its default and the environment."""
+    if os.getenv(f'{name}_URL'):
+        return os.getenv(f'{name}_URL')
+    if UPSTREAM_BASE_URL:
+        parsed = urllib.parse.urlparse(default)
+        return UPSTREAM_BASE_URL.rstrip('/') + parsed.path
+    return default
+
+WIKIPEDIA_API_URL = upstream_url('WIKIPEDIA_API', "https://en.wikipedia.org/w/api.php")
+ARXIV_API_URL = upstream_url('ARXIV_API', "http://export.arxiv.org/api/query")
+NEWS_API_URL = upstream_url('NEWS_API', "https://newsapi.org/v2/everything")
+REDDIT_SEARCH_URL = upstream_url('REDDIT_SEARCH', "https://www.reddit.com/search.json")
+YOUTUBE_API_URL = upstream_url('YOUTUBE_API', "https://www.googleapis.com/youtube/v3/search")
+YOUTUBE_SEARCH_URL = upstream_url('YOUTUBE_SEARCH', "https://www.youtube.com/results")
+DUCKDUCKGO_URL = upstream_url('DUCKDUCKGO', "https://html.duckduckgo.com/html/")
+QWANT_API_URL = upstream_url('QWANT_API', "https://api.qwant.com/v3/search/web")
 
 app = Flask(__name__)
 CORS(app)
 
-# Load sentence transformer model for better semantic search
-model = SentenceTransformer('sentence-transformers/all-mpnet-base-v2')
+# Sentence encoder for semantic search. It is loaded by load_model(), either
+# before the app starts serving or, with FAST_STARTUP=1, in a background thread
+# while /healthz already answers and /readyz reports 503. ENCODER_BACKEND picks
+# torch (fp32), torch-int8, onnx (exported to ONNX_MODEL_DIR) or minilm.
+MODEL_NAME = os.getenv('MODEL_NAME', DEFAULT_MODEL)
+ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR')
+FAST_STARTUP = os.getenv('FAST_STARTUP', '0') == '1'
+encoder = None
+embedding_cache = None
+local_index = None
+model_ready = threading.Event()
+model_error = None
+_model_lock = threading.Lock()
+
+# Number of texts per encoder forward pass when scoring candidates
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '32'))
+
+# Encode calls from concurrent requests are merged into micro-batches of up to
+# EMBED_MICROBATCH_SIZE texts, waiting at most EMBED_MICROBATCH_WAIT_MS for company.
+# With EMBED_SERVICE_ADDRESS set, the model is not loaded here at all: every web
+# worker shares the batched encoder served by `python embedding_service.py serve`.
+EMBED_MICROBATCH = os.getenv('EMBED_MICROBATCH', '1') == '1'
+EMBED_MICROBATCH_SIZE = int(os.getenv('EMBED_MICROBATCH_SIZE', '64'))
+EMBED_MICROBATCH_WAIT_MS = float(os.getenv('EMBED_MICROBATCH_WAIT_MS', '5'))
+EMBED_SERVICE_ADDRESS = os.getenv('EMBED_SERVICE_ADDRESS')
+
+# Representative inputs pushed through the encoder before taking traffic
+WARMUP_TEXTS = [
+    "machine learning",
+    "Latest research on large language models and their applications in healthcare.",
+    "A history of the Roman Empire from its founding to the fall of Constantinople in 1453, covering politics, economy and culture."
+] * 4
+
+# Results whose embeddings reach this cosine similarity are treated as the same story,
+# and no third-party domain may contribute more than MAX_PER_DOMAIN results to a response.
+# Only DOMAIN_CAPPED_SOURCES link to third-party sites; every result of the other
+# sources sits on the source's own domain, so capping them would cap the source.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.92'))
+MAX_PER_DOMAIN = int(os.getenv('MAX_PER_DOMAIN', '2'))
+DOMAIN_CAPPED_SOURCES = set(os.getenv('DOMAIN_CAPPED_SOURCES', 'web,news').split(','))
+
+# Hybrid ranking: only the LEXICAL_TOP_K candidates per source with the best BM25
+# match reach the encoder (0 sends all of them), and relevance is the embedding
+# cosine plus up to LEXICAL_WEIGHT for the strongest keyword match.
+LEXICAL_TOP_K = int(os.getenv('LEXICAL_TOP_K', '6'))
+LEXICAL_WEIGHT = float(os.getenv('LEXICAL_WEIGHT', '0.1'))
+
+# Extractive summaries: SUMMARY_SENTENCES sentences overall and SUMMARY_SOURCE_SENTENCES
+# per source, picked from the top results' content. SUMMARY_DIVERSITY trades
+# relevance to the query (0) against novelty over the sentences already picked (1).
+SUMMARY_SENTENCES = int(os.getenv('SUMMARY_SENTENCES', '5'))
+SUMMARY_SOURCE_SENTENCES = int(os.getenv('SUMMARY_SOURCE_SENTENCES', '2'))
+SUMMARY_RESULTS_PER_SOURCE = int(os.getenv('SUMMARY_RESULTS_PER_SOURCE', '2'))
+SUMMARY_DIVERSITY = float(os.getenv('SUMMARY_DIVERSITY', '0.3'))
+
+# Response encoding: results carry only the fields= a client asks for (all by default),
+# relevance is rounded to RELEVANCE_DECIMALS, and bodies of at least COMPRESS_MIN_BYTES
+# are brotli- or gzip-compressed when the client accepts it.
+RELEVANCE_DECIMALS = int(os.getenv('RELEVANCE_DECIMALS', '4'))
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+
+# Local corpus of results already retrieved from these sources, searched as the
+# 'local' source. Disabled unless LOCAL_INDEX_PATH is set.
+LOCAL_INDEX_PATH = os.getenv('LOCAL_INDEX_PATH')
+LOCAL_INDEX_SOURCES = set(os.getenv('LOCAL_INDEX_SOURCES', 'wikipedia,arxiv,news').split(','))
+
+# Persistent cache of raw upstream responses, below the result cache: sources with an
+# HTTP cache_ttl (wikipedia, arxiv and youtube by default) are answered from it while
+# fresh and revalidated with ETag/Last-Modified afterwards. Disabled unless
+# HTTP_CACHE_PATH (an sqlite file) is set; bodies are capped at HTTP_CACHE_MAX_BYTES.
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH')
+http_cache = None
+if HTTP_CACHE_PATH:
+    http_cache = HTTPCache(HTTP_CACHE_PATH, max_bytes=int(os.getenv('HTTP_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+    enable_response_cache(http_cache)
+    atexit.register(http_cache.close)
+
+def load_model() -> None:
+    """Load the encoder and embedding cache, run a warmup pass and mark the app ready."""
+    global encoder, embedding_cache, local_index, model_error
+    with _model_lock:
+        if model_ready.is_set():
+            return
+        try:
+            started = time.monotonic()
+            if EMBED_SERVICE_ADDRESS:
+                encoder = RemoteEncoder(EMBED_SERVICE_ADDRESS, authkey=load_authkey())
+            elif EMBED_MICROBATCH:
+                encoder = MicroBatcher(load_encoder(ENCODER_BACKEND, MODEL_NAME, ONNX_MODEL_DIR),
+                                       max_batch_size=EMBED_MICROBATCH_SIZE,
+                                       max_wait=EMBED_MICROBATCH_WAIT_MS / 1000,
+                                       batch_size=EMBED_BATCH_SIZE)
+            else:
+                encoder = load_encoder(ENCODER_BACKEND, MODEL_NAME, ONNX_MODEL_DIR)
+            
+            # Embedding cache: bounded in-memory LRU plus an optional memory-mapped disk tier.
+            # Vectors differ per backend, so each one gets its own disk files.
+            cache_path = os.getenv('EMBED_CACHE_PATH')
+            embedding_cache = EmbeddingCache(
+                dim=encoder.dim,
+                max_items=int(os.getenv('EMBED_CACHE_SIZE', '50000')),
+                disk_path=f"{cache_path}-{encoder.name}" if cache_path else None,
+                disk_capacity=int(os.getenv('EMBED_CACHE_DISK_CAPACITY', '500000'))
+            )
+            atexit.register(embedding_cache.close)
+            if LOCAL_INDEX_PATH:
+                local_index = LocalIndex(
+                    dim=encoder.dim,
+                    path=f"{LOCAL_INDEX_PATH}-{encoder.name}",
+                    capacity=int(os.getenv('LOCAL_INDEX_CAPACITY', '100000'))
+                )
+                atexit.register(local_index.close)
+            
+            # Warmup bypasses the cache so the real forward path is exercised at
+            # both single-item and batched shapes
+            encoder.encode(WARMUP_TEXTS[:1])
+            encoder.encode(WARMUP_TEXTS, batch_size=EMBED_BATCH_SIZE)
+            model_ready.set()
+            backend = f"service at {EMBED_SERVICE_ADDRESS}" if EMBED_SERVICE_ADDRESS else ENCODER_BACKEND
+            print(f"Encoder {encoder.name} ({backend}) loaded and warmed up in {time.monotonic() - started:.1f}s")
+        except Exception as e:
+            model_error = str(e)
+            print(f"Error loading {ENCODER_BACKEND} encoder: {e}")
+            raise
 
 def get_embedding(text: str) -> np.ndarray:
-    """Generate embeddings for a given text using SentenceTransformer."""
-    return model.encode(text, convert_to_tensor=True)
+    """Generate a normalized embedding for a given text with the active encoder."""
+    return encode_texts([text])[0]
 
-def compute_similarity(query_embedding: torch.Tensor, text: str) -> float:
+def compute_similarity(query_embedding: np.ndarray, text: str) -> float:
     """Calculate semantic similarity between query and text."""
-    if not text.strip():
-        return 0.0
-    text_embedding = model.encode(text, convert_to_tensor=True)
-    similarity = util.pytorch_cos_sim(query_embedding, text_embedding)[0][0].item()
-    return similarity
+    return score_texts(query_embedding, [text])[0]
+
+def encode_texts(texts: List[str]) -> np.ndarray:
+    """Encode texts into normalized embeddings, running the encoder only on cache misses.
+
+    Misses are deduplicated by content hash and encoded in a single batched
+    forward pass.
+    """
+    if not texts:
+        return np.empty((0, embedding_cache.dim), dtype=np.float32)
+    keys = [get_content_hash(text) for text in texts]
+    vectors = embedding_cache.get_many(keys)
+
+    missing = {}
+    for key, text, vector in zip(keys, texts, vectors):
+        if vector is None:
+            missing.setdefault(key, text)
+    if missing:
+        encoded = encoder.encode(list(missing.values()), batch_size=EMBED_BATCH_SIZE)
+        embedding_cache.put_many(list(missing), encoded)
+        fresh = dict(zip(missing, encoded))
+        vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+    return np.vstack(vectors).astype(np.float32, copy=False)
+
+def score_texts(query_embedding: np.ndarray, texts: List[str]) -> List[float]:
+    """Score many texts against the query with one encode and one cosine matrix."""
+    scores = [0.0] * len(texts)
+    indices = [i for i, text in enumerate(texts) if text.strip()]
+    if not indices:
+        return scores
+    text_embeddings = encode_texts([texts[i] for i in indices])
+    # Embeddings are normalized, so the dot product is the cosine similarity
+    similarities = (text_embeddings @ query_embedding).tolist()
+    for i, similarity in zip(indices, similarities):
+        scores[i] = similarity
+    return scores
+
+def lexical_bonus(query: str, texts: List[str]) -> np.ndarray:
+    """BM25 match of each text against the query, scaled so the best match adds LEXICAL_WEIGHT."""
+    scores = bm25_scores(query, texts)
+    best = scores.max() if len(scores) else 0.0
+    return scores * (LEXICAL_WEIGHT / best) if best > 0 else scores
+
+def prefilter_candidates(query: str, candidates: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Tuple[Dict[str, Any], float]]]:
+    """Keep the LEXICAL_TOP_K candidates per source that best match the query terms, with their lexical bonus.
+
+    Ties keep the upstream's own order, so a source whose results share no
+    terms with the query keeps its top results.
+    """
+    flat = [(source, result) for source, results in candidates.items() for result in results]
+    bonuses = lexical_bonus(query, [result.get("_text", "") for _, result in flat]).tolist()
+    kept = {source: [] for source in candidates}
+    for (source, result), bonus in zip(flat, bonuses):
+        kept[source].append((result, bonus))
+    for source, pairs in kept.items():
+        pairs.sort(key=lambda pair: pair[1], reverse=True)
+        if LEXICAL_TOP_K > 0:
+            del pairs[LEXICAL_TOP_K:]
+    return kept
+
+def score_candidates(candidates: Dict[str, List[Dict[str, Any]]], query: str, query_embedding: np.ndarray, max_results: int = 3) -> Dict[str, List[Dict[str, Any]]]:
+    """Score raw candidates from every source in one batch and keep the top max_results per source.
+
+    A BM25 prefilter decides which candidates are worth embedding; the survivors
+    are scored by cosine plus their lexical bonus. Source adapters only return
+    raw candidates carrying the text to score under ``_text``; it is consumed
+    here so it never reaches the response.
+    """
+    flat = [(source, result, bonus) for source, pairs in prefilter_candidates(query, candidates).items() for result, bonus in pairs]
+    scores = score_texts(query_embedding, [result.pop("_text", "") for _, result, _ in flat])
+
+    scored = {source: [] for source in candidates}
+    for (source, result, bonus), score in zip(flat, scores):
+        result["relevance"] = score + bonus
+        scored[source].append(result)
+
+    for source, results in scored.items():
+        results.sort(key=lambda x: x["relevance"], reverse=True)
+        scored[source] = results[:max_results]
+    return scored
 
 def get_content_hash(content: str) -> str:
     """Generate a hash of the content to detect duplicates."""
     return hashlib.md5(content.lower().encode()).hexdigest()
 
-def remove_duplicates(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove duplicate results based on content similarity and URL patterns."""
-    seen_hashes = set()
-    seen_domains = set()
-    unique_results = []
-    
-    for result in results:
-        content = f"{result['title']} {result.get('snippet', '')}"
-        content_hash = get_content_hash(content)
-        
-        # Extract domain from URL
-        domain = urllib.parse.urlparse(result['url']).netloc
-        
-        # Check if content is unique and domain hasn't been seen too many times
-        if content_hash not in seen_hashes and domain_count(seen_domains, domain) < 2:
-            seen_hashes.add(content_hash)
-            seen_domains.add(domain)
-            unique_results.append(result)
-            
-    return unique_results
+def result_text(result: Dict[str, Any]) -> str:
+    """Text a result is embedded and compared by."""
+    return f"{result['title']} {result.get('snippet', '')}"
+
+def remove_duplicates(results: List[Dict[str, Any]], embeddings: np.ndarray = None, semantic: bool = True) -> List[Dict[str, Any]]:
+    """Remove exact and semantic near-duplicates and cap results per third-party domain.
 
-def domain_count(seen_domains: set, domain: str) -> int:
-    """Count how many times a domain has been seen."""
-    return sum(1 for d in seen_domains if d == domain)
+    Results must be sorted best first so the best copy survives. Pass the
+    results' embeddings when they are already computed. Without ``semantic``
+    only exact duplicates and the domain cap apply, and nothing is encoded.
+    """
+    texts = [result_text(result) for result in results]
+    if not semantic:
+        embeddings = np.zeros((len(results), 1), dtype=np.float32)
+    elif embeddings is None:
+        embeddings = encode_texts(texts)
+    kept = dedupe_indices(
+        [get_content_hash(text) for text in texts],
+        [result_domain(result['url']) if result.get('source') in DOMAIN_CAPPED_SOURCES else None for result in results],
+        embeddings,
+        threshold=NEAR_DUPLICATE_THRESHOLD,
+        max_per_domain=MAX_PER_DOMAIN,
+    )
+    return [results[i] for i in kept]
 
-def filter_relevant_results(results: List[Dict[str, Any]], query_embedding: torch.Tensor, threshold: float = 0.3) -> List[Dict[str, Any]]:
-    """Filter results based on relevance score."""
+def filter_relevant_results(results: List[Dict[str, Any]], query_embedding: np.ndarray, threshold: float = 0.3, query: str = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Keep results scoring at least threshold, sorted by relevance, along with their embeddings.
+
+    With the query text, relevance includes the lexical bonus on top of the cosine.
+    """
+    texts = [result_text(result) for result in results]
+    embeddings = encode_texts(texts)
+    similarities = embeddings @ query_embedding
+    if query is not None:
+        similarities = similarities + lexical_bonus(query, texts)
+    order = [i for i in np.argsort(-similarities, kind='stable') if similarities[i] >= threshold]
     filtered_results = []
-    
-    for result in results:
-        content = f"{result['title']} {result.get('snippet', '')}"
-        similarity = compute_similarity(query_embedding, content)
-        
-        if similarity >= threshold:
-            result['relevance'] = similarity
-            filtered_results.append(result)
-            
-    return filtered_results
+    for i in order:
+        results[i]['relevance'] = float(similarities[i])
+        filtered_results.append(results[i])
+    return filtered_results, embeddings[order]
 
-def fetch_content(url):
-    """Fetch the full content from a URL."""
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Remove script, style, and nav elements
-        for tag in soup(["script", "style", "nav", "header", "footer", "aside"]):
-            tag.decompose()
-            
-        # Extract main content based on common content containers
-        content = ""
-        main_elements = soup.select("main, article, #content, .content, .main, #main, .post, #post")
-        
-        if main_elements:
-            for element in main_elements:
-                content += element.get_text(separator=" ", strip=True) + " "
-        else:
-            # Fallback to body text if no main content containers found
-            content = soup.body.get_text(separator=" ", strip=True)
-            
-        # Clean up the content
-        content = re.sub(r'\s+', ' ', content).strip()
-        return content[:10000]  # Limit content length to avoid errors
-    except Exception as e:
-        print(f"Error fetching content from {url}: {e}")
-        return ""
+def deepen_results(query_embedding: np.ndarray, ranked_results: List[Dict[str, Any]], embeddings: np.ndarray) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Blend full-page relevance into the top results and re-rank them.
+
+    The top DEEP_CONTENT_TOP_N result pages are fetched concurrently within
+    DEEP_CONTENT_BUDGET; pages that do not arrive in time keep their snippet score.
+    """
+    candidates = [result['url'] for result in ranked_results if result['source'] != 'youtube'][:DEEP_CONTENT_TOP_N]
+    pages = page_fetcher.fetch_many(candidates, DEEP_CONTENT_BUDGET)
+    if not pages:
+        return ranked_results, embeddings
+    deepened = [i for i, result in enumerate(ranked_results) if result['url'] in pages]
+    # The encoder truncates long inputs anyway, so only the opening of each page is embedded
+    page_scores = encode_texts([pages[ranked_results[i]['url']][:2000] for i in deepened]) @ query_embedding
+    for i, page_score in zip(deepened, page_scores):
+        result = ranked_results[i]
+        result['relevance'] = (1 - DEEP_CONTENT_WEIGHT) * result['relevance'] + DEEP_CONTENT_WEIGHT * float(page_score)
+    order = sorted(range(len(ranked_results)), key=lambda i: ranked_results[i]['relevance'], reverse=True)
+    return [ranked_results[i] for i in order], embeddings[order]
 
 # Wikipedia Search
-def search_wikipedia(query, query_embedding, max_results=3):
-    url = f"https://en.wikipedia.org/w/api.php?action=query&list=search&srsearch={query}&format=json"
+def fetch_wikipedia_extracts(page_ids):
+    """Fetch plain-text intro extracts for many pages in one request, keyed by pageid."""
+    params = {
+        "action": "query",
+        "prop": "extracts",
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": "max",
+        "pageids": "|".join(str(page_id) for page_id in page_ids),
+        "format": "json",
+        "formatversion": 2
+    }
+    response = http_get('wikipedia', WIKIPEDIA_API_URL, params=params).json()
+    return {page["pageid"]: page.get("extract", "") for page in response.get("query", {}).get("pages", []) if "pageid" in page}
+
+def parse_wikipedia_search(response):
+    """Search hits with plain-text snippets and whatever intro extracts came along, in rank order."""
+    data = response.json()
+    extracts = {page["pageid"]: page.get("extract", "") for page in data["query"].get("pages", []) if "pageid" in page}
+    return [{
+        "pageid": item["pageid"],
+        "title": item["title"],
+        "snippet": BeautifulSoup(item.get("snippet", ""), "html.parser").get_text(),
+        "extract": extracts.get(item["pageid"], "")
+    } for item in data["query"]["search"]]
+
+def search_wikipedia(query):
+    # One round trip: list=search gives ranked titles and snippets, while the
+    # search generator feeds the same hits to prop=extracts for their intros
+    params = {
+        "action": "query",
+        "list": "search",
+        "srsearch": query,
+        "srlimit": 10,
+        "generator": "search",
+        "gsrsearch": query,
+        "gsrlimit": 10,
+        "prop": "extracts",
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": "max",
+        "format": "json",
+        "formatversion": 2
+    }
     try:
-        response = requests.get(url).json()
-        results = []
+        search_hits = http_get_parsed('wikipedia', WIKIPEDIA_API_URL, parse_wikipedia_search, params=params)
+        
+        # Extracts can be cut short by continuation; fetch any stragglers in one batched call
+        missing = [item["pageid"] for item in search_hits if not item["extract"]]
+        extracts = fetch_wikipedia_extracts(missing) if missing else {}
         
-        for item in response["query"]["search"]:
+        results = []
+        for item in search_hits:
             title = item["title"]
             page_url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
-            snippet = BeautifulSoup(item.get("snippet", ""), "html.parser").get_text()
-            
-            # Get full content for top results
-            content_url = f"https://en.wikipedia.org/w/api.php?action=query&prop=extracts&exintro=1&explaintext=1&titles={title.replace(' ', '_')}&format=json"
-            content_response = requests.get(content_url).json()
-            page_id = next(iter(content_response["query"]["pages"]))
-            full_content = content_response["query"]["pages"][page_id].get("extract", snippet)
+            snippet = item["snippet"]
+            full_content = item["extract"] or extracts.get(item["pageid"]) or snippet
             
             results.append({
                 "title": title,
                 "url": page_url,
                 "snippet": snippet,
                 "content": full_content,
-                "relevance": compute_similarity(query_embedding, title + " " + full_content)
+                "_text": title + " " + full_content
             })
             
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return [{"title": r["title"], "url": r["url"], "snippet": r["snippet"], "content": r["content"], "relevance": r["relevance"]} for r in results[:max_results]]
+        return results
     except Exception as e:
         print(f"Wikipedia search error: {e}")
         return []
 
 # ArXiv Search
-def search_arxiv(query, query_embedding, max_results=3):
-    url = f"http://export.arxiv.org/api/query?search_query=all:{query}&max_results=10"
+def parse_arxiv_feed(response):
+    """Results from an arXiv Atom feed; malformed entries are skipped."""
+    entries = response.text.split('<entry>')[1:]
+    results = []
+    
+    for entry in entries:
+        try:
+            title = entry.split('<title>')[1].split('</title>')[0].strip()
+            abstract = ""
+            if "<summary>" in entry:
+                abstract = entry.split('<summary>')[1].split('</summary>')[0].strip()
+            link = entry.split('<id>')[1].split('</id>')[0].strip()
+            
+            results.append({
+                "title": title,
+                "url": link,
+                "snippet": abstract[:200] + "..." if len(abstract) > 200 else abstract,
+                "content": abstract,
+                "_text": title + " " + abstract
+            })
+        except Exception as e:
+            print(f"Error parsing ArXiv entry: {e}")
+            continue
+
+    return results
+
+def search_arxiv(query):
+    url = f"{ARXIV_API_URL}?search_query=all:{query}&max_results=10"
     try:
-        response = requests.get(url).text
-        entries = response.split('<entry>')[1:]
-        results = []
-        
-        for entry in entries:
-            try:
-                title = entry.split('<title>')[1].split('</title>')[0].strip()
-                abstract = ""
-                if "<summary>" in entry:
-                    abstract = entry.split('<summary>')[1].split('</summary>')[0].strip()
-                link = entry.split('<id>')[1].split('</id>')[0].strip()
-                
-                results.append({
-                    "title": title,
-                    "url": link,
-                    "snippet": abstract[:200] + "..." if len(abstract) > 200 else abstract,
-                    "content": abstract,
-                    "relevance": compute_similarity(query_embedding, title + " " + abstract)
-                })
-            except Exception as e:
-                print(f"Error parsing ArXiv entry: {e}")
-                continue
-                
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return [{"title": r["title"], "url": r["url"], "snippet": r["snippet"], "content": r["content"], "relevance": r["relevance"]} for r in results[:max_results]]
+        return http_get_parsed('arxiv', url, parse_arxiv_feed)
     except Exception as e:
         print(f"ArXiv search error: {e}")
         return []
 
 # News API Search
-def search_news(query, query_embedding, max_results=3):
+def search_news(query):
     try:
         # Using NewsAPI.org
-        base_url = "https://newsapi.org/v2/everything"
-        api_key = "bb4256541ca24dbda24d80e21d29bd51"
-        
+        base_url = NEWS_API_URL
         params = {
             'q': query,
-            'apiKey': api_key,
+            'apiKey': NEWS_API_KEY,
             'language': 'en',
             'sortBy': 'relevancy',
             'pageSize': 10  # Get 10 results to filter for relevance
         }
         
-        response = requests.get(base_url, params=params)
+        response = http_get('news', base_url, params=params)
         if not response.ok:
             print(f"News API error: {response.status_code}")
             return []
@@ -238,27 +507,25 @@ def search_news(query, query_embedding, max_results=3):
                         "url": url,
                     "snippet": snippet,
                         "content": content,
-                        "relevance": compute_similarity(query_embedding, content)
+                        "_text": content
                 })
             except Exception as e:
                 print(f"Error processing news item: {e}")
                 continue
 
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return results[:max_results]
+        return results
         
     except Exception as e:
         print(f"News search error: {e}")
         return []
 
 # Reddit Search
-def search_reddit(query, query_embedding, max_results=3):
-    url = f"https://www.reddit.com/search.json?q={query}&limit=10"
+def search_reddit(query):
+    url = f"{REDDIT_SEARCH_URL}?q={query}&limit=10"
     headers = {"User-Agent": "Search-App/1.0 (by /u/SearchAppDev)"}
     
     try:
-        response = requests.get(url, headers=headers).json()
+        response = http_get('reddit', url, headers=headers).json()
         results = []
         
         for post in response["data"]["children"]:
@@ -272,24 +539,61 @@ def search_reddit(query, query_embedding, max_results=3):
                 "url": url,
                 "snippet": selftext[:200] + "..." if len(selftext) > 200 else selftext,
                 "content": selftext,
-                "relevance": compute_similarity(query_embedding, title + " " + selftext)
+                "_text": title + " " + selftext
             })
             
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return [{"title": r["title"], "url": r["url"], "snippet": r["snippet"], "content": r["content"], "relevance": r["relevance"]} for r in results[:max_results]]
+        return results
     except Exception as e:
         print(f"Reddit search error: {e}")
         return []
 
+def parse_youtube_results(response):
+    """Results from a YouTube Data API search response; raises when the API call failed."""
+    if not response.ok:
+        print(f"YouTube API error: Status code {response.status_code}")
+        print(f"Response content: {response.text}")
+        raise Exception(f"YouTube API error: {response.status_code}")
+        
+    data = response.json()
+    results = []
+    
+    if 'items' not in data:
+        print(f"No items in YouTube response: {data}")
+        raise Exception("No items in YouTube response")
+        
+    for item in data['items']:
+        try:
+            video_id = item['id']['videoId']
+            snippet = item['snippet']
+            title = snippet.get('title', '')
+            description = snippet.get('description', '')
+            url = f"https://www.youtube.com/watch?v={video_id}"
+            
+            if title and url:
+                content = f"{title}. {description}"
+                
+                results.append({
+                    "title": title,
+                    "url": url,
+                    "snippet": description[:200] + "..." if len(description) > 200 else description,
+                    "content": content,
+                    "_text": content
+                })
+                
+        except Exception as e:
+            print(f"Error processing YouTube result: {e}")
+            continue
+
+    return results
+
 # YouTube Search (No API key required)
-def search_youtube(query, query_embedding, max_results=3):
+def search_youtube(query, allow_scrape=True):
     try:
         if not YOUTUBE_API_KEY:
             print("YouTube API key not found in environment variables")
             raise Exception("YouTube API key not configured")
 
-        base_url = "https://www.googleapis.com/youtube/v3/search"
+        base_url = YOUTUBE_API_URL
         params = {
             'part': 'snippet',
             'q': query,
@@ -299,58 +603,22 @@ def search_youtube(query, query_embedding, max_results=3):
             'relevanceLanguage': 'en'
         }
         
-        response = requests.get(base_url, params=params)
-        if not response.ok:
-            print(f"YouTube API error: Status code {response.status_code}")
-            print(f"Response content: {response.text}")
-            raise Exception(f"YouTube API error: {response.status_code}")
-            
-        data = response.json()
-        results = []
-        
-        if 'items' not in data:
-            print(f"No items in YouTube response: {data}")
-            raise Exception("No items in YouTube response")
-            
-        for item in data['items']:
-            try:
-                video_id = item['id']['videoId']
-                snippet = item['snippet']
-                title = snippet.get('title', '')
-                description = snippet.get('description', '')
-                url = f"https://www.youtube.com/watch?v={video_id}"
-                
-                if title and url:
-                    content = f"{title}. {description}"
-                    
-                    results.append({
-                        "title": title,
-                        "url": url,
-                        "snippet": description[:200] + "..." if len(description) > 200 else description,
-                        "content": content,
-                        "relevance": compute_similarity(query_embedding, content)
-                    })
-                    
-            except Exception as e:
-                print(f"Error processing YouTube result: {e}")
-                continue
-                
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return results[:max_results]
+        return http_get_parsed('youtube', base_url, parse_youtube_results, params=params)
         
     except Exception as e:
         print(f"YouTube API search error: {e}")
+        if not allow_scrape:
+            return []
         print("Falling back to web scraping method...")
         # Fallback to scraping search results if API fails
         try:
-            search_url = f"https://www.youtube.com/results?search_query={urllib.parse.quote(query)}"
+            search_url = f"{YOUTUBE_SEARCH_URL}?search_query={urllib.parse.quote(query)}"
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Accept-Language': 'en-US,en;q=0.9'
             }
             
-            response = requests.get(search_url, headers=headers)
+            response = http_get('youtube', search_url, headers=headers)
             if not response.ok:
                 print(f"YouTube scraping error: Status code {response.status_code}")
                 return []
@@ -395,7 +663,7 @@ def search_youtube(query, query_embedding, max_results=3):
                                 "url": url,
                                 "snippet": description[:200] + "..." if len(description) > 200 else description,
                                 "content": content,
-                                "relevance": compute_similarity(query_embedding, content)
+                                "_text": content
                             })
                             
                     except Exception as e:
@@ -405,10 +673,8 @@ def search_youtube(query, query_embedding, max_results=3):
             except Exception as e:
                 print(f"Error parsing YouTube page data: {e}")
                 return []
-                
-            # Sort by relevance and take top max_results
-            results.sort(key=lambda x: x["relevance"], reverse=True)
-            return results[:max_results]
+
+            return results
             
         except Exception as e:
             print(f"YouTube fallback search error: {e}")
@@ -417,10 +683,10 @@ def search_youtube(query, query_embedding, max_results=3):
         return []
 
 # Web Search using DuckDuckGo
-def search_web(query, query_embedding, max_results=3):
+def search_web(query):
     try:
         # Using direct HTTP request to DuckDuckGo
-        url = "https://html.duckduckgo.com/html/"
+        url = DUCKDUCKGO_URL
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -430,7 +696,7 @@ def search_web(query, query_embedding, max_results=3):
             'dc': '20'
         }
         
-        response = requests.post(url, headers=headers, data=data)
+        response = http_post('web', url, headers=headers, data=data)
         if not response.ok:
             print(f"Web search error: Status code {response.status_code}")
             return []
@@ -456,8 +722,10 @@ def search_web(query, query_embedding, max_results=3):
                 snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
                 
                 if title and url:
-                    # Clean the URL if it's a redirect URL
-                    if url.startswith('/'):
+                    # Clean the URL if it's a redirect URL; DuckDuckGo links are often protocol-relative
+                    if url.startswith('//'):
+                        url = f"https:{url}"
+                    elif url.startswith('/'):
                         url = f"https://duckduckgo.com{url}"
                     
                     content = f"{title}. {snippet}"
@@ -467,23 +735,21 @@ def search_web(query, query_embedding, max_results=3):
                         "url": url,
                         "snippet": snippet,
                         "content": content,
-                        "relevance": compute_similarity(query_embedding, content)
+                        "_text": content
                     })
             
             except Exception as e:
                 print(f"Error processing web result: {e}")
                 continue
-        
-        # Sort by relevance and take top max_results
-        results.sort(key=lambda x: x["relevance"], reverse=True)
-        return results[:max_results]
+
+        return results
         
     except Exception as e:
         print(f"Web search error: {e}")
         # Fallback to alternative search if main search fails
         try:
             # Using Qwant as fallback
-            qwant_url = f"https://api.qwant.com/v3/search/web"
+            qwant_url = QWANT_API_URL
             params = {
                 'q': query,
                 'locale': 'en_US',
@@ -493,7 +759,7 @@ def search_web(query, query_embedding, max_results=3):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             
-            response = requests.get(qwant_url, params=params, headers=headers)
+            response = http_get('web', qwant_url, params=params, headers=headers)
             if not response.ok:
                 return []
                 
@@ -513,12 +779,10 @@ def search_web(query, query_embedding, max_results=3):
                             "url": url,
                             "snippet": snippet,
                             "content": content,
-                            "relevance": compute_similarity(query_embedding, content)
+                            "_text": content
                         })
-                
-                # Sort by relevance and take top max_results
-                results.sort(key=lambda x: x["relevance"], reverse=True)
-                return results[:max_results]
+
+                return results
                 
         except Exception as e:
             print(f"Fallback search error: {e}")
@@ -526,73 +790,514 @@ def search_web(query, query_embedding, max_results=3):
             
         return []
 
-def generate_comprehensive_summary(query, all_results):
-    """Generate a comprehensive summary from all search results."""
-    # Combine content from all sources, prioritizing high relevance results
-    combined_content = f"Information about {query}:\n\n"
+# Previously retrieved results from the local index
+def search_local(query):
+    if local_index is None:
+        return []
+    # The query embedding is already in the embedding cache by the time sources run
+    hits = local_index.search(get_embedding(query), k=10, min_score=0.3)
+    for hit in hits:
+        hit.pop("relevance")
+        hit["origin"] = hit.pop("source", None)
+        hit["_text"] = result_text(hit)
+    return hits
+
+def generate_comprehensive_summary(query: str, all_results: Dict[str, List[Dict[str, Any]]], query_embedding: np.ndarray = None) -> Dict[str, Any]:
+    """Extractive summary of the top results, overall and per source.
+    
+    Sentences from the best SUMMARY_RESULTS_PER_SOURCE results of each source
+    are embedded in one cached batch and picked by maximal marginal relevance
+    to the query.
+    """
+    if query_embedding is None:
+        query_embedding = get_embedding(query)
     
-    # Sort all results by relevance
-    flat_results = []
+    sentences, origins = [], []
     for source, results in all_results.items():
-        for result in results:
-            flat_results.append({
-                "source": source,
-                "title": result["title"],
-                "url": result["url"],
-                "content": result["content"],
-                "relevance": result["relevance"]
-            })
+        ranked = sorted(results, key=lambda x: x.get("relevance", 0), reverse=True)
+        for result in ranked[:SUMMARY_RESULTS_PER_SOURCE]:
+            for sentence in split_sentences(result.get("content") or result.get("snippet", "")):
+                sentences.append(sentence)
+                origins.append(source)
+    if not sentences:
+        return {"main_summary": "", "source_summaries": {}}
     
-    # Sort by relevance, highest first
-    flat_results.sort(key=lambda x: x["relevance"], reverse=True)
+    embeddings = encode_texts(sentences)
+    relevance = embeddings @ query_embedding
+    picked = mmr_select(relevance, embeddings, SUMMARY_SENTENCES, SUMMARY_DIVERSITY)
     
-    # Get top 5 most relevant pieces of content
-    top_contents = []
-    sources_included = set()
+    source_summaries = {}
+    origins = np.array(origins)
+    for source in all_results:
+        rows = np.flatnonzero(origins == source)
+        if len(rows):
+            source_picked = mmr_select(relevance[rows], embeddings[rows], SUMMARY_SOURCE_SENTENCES, SUMMARY_DIVERSITY)
+            source_summaries[source] = " ".join(sentences[rows[i]] for i in source_picked)
     
-    for result in flat_results:
-        # Ensure diverse sources
-        if len(top_contents) < 5 or result["source"] not in sources_included:
-            top_contents.append(result["content"])
-            sources_included.add(result["source"])
-            
-        if len(top_contents) >= 8:  # Limit to 8 total sources
-            break
+    return {
+        "main_summary": " ".join(sentences[i] for i in picked),
+        "source_summaries": source_summaries
+    }
+
+# Source adapters, in response order. Each returns raw, unscored candidates.
+SOURCES = {
+    'web': search_web,
+    'wikipedia': search_wikipedia,
+    'arxiv': search_arxiv,
+    'news': search_news,
+    'reddit': search_reddit,
+    'youtube': search_youtube
+}
+if LOCAL_INDEX_PATH:
+    SOURCES['local'] = search_local
+
+# Cheaper adapters used by degraded searches
+DEGRADED_ADAPTERS = {
+    'youtube': functools.partial(search_youtube, allow_scrape=False)
+}
+
+# Per-source cache lifetimes in seconds: news moves fast, encyclopedic sources rarely change
+SOURCE_TTLS = {
+    'web': int(os.getenv('WEB_CACHE_TTL', '1800')),
+    'wikipedia': int(os.getenv('WIKIPEDIA_CACHE_TTL', '86400')),
+    'arxiv': int(os.getenv('ARXIV_CACHE_TTL', '86400')),
+    'news': int(os.getenv('NEWS_CACHE_TTL', '300')),
+    'reddit': int(os.getenv('REDDIT_CACHE_TTL', '900')),
+    'youtube': int(os.getenv('YOUTUBE_CACHE_TTL', '3600')),
+    'local': int(os.getenv('LOCAL_CACHE_TTL', '60'))
+}
+
+# Scored per-source results keyed on (normalized query, source)
+result_cache = ResultCache(
+    max_items=int(os.getenv('RESULT_CACHE_SIZE', '5000')),
+    stale_ttl=int(os.getenv('RESULT_CACHE_STALE_TTL', '3600'))
+)
+refresh_executor = concurrent.futures.ThreadPoolExecutor(max_workers=int(os.getenv('RESULT_REFRESH_WORKERS', '2')))
+
+# Cursor pagination: sources keep up to CANDIDATES_PER_SOURCE scored results, and a
+# search stores its whole ranked, deduplicated set in a session for SEARCH_SESSION_TTL
+# seconds. Pages hold PAGE_SIZE results per source; page 2 onwards is served from
+# the session without touching the encoder or the upstreams.
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', '3'))
+CANDIDATES_PER_SOURCE = int(os.getenv('CANDIDATES_PER_SOURCE', '10'))
+SEARCH_SESSION_TTL = int(os.getenv('SEARCH_SESSION_TTL', '600'))
+search_sessions = SearchSessions(page_size=PAGE_SIZE, ttl=SEARCH_SESSION_TTL, max_items=int(os.getenv('SEARCH_SESSION_MAX', '2000')))
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keys: lowercase with collapsed whitespace."""
+    return " ".join(query.lower().split())
+
+# Upstream fan-out: one shared pool, a global latency budget and per-source deadlines.
+# Each source may hold FANOUT_SOURCE_CONCURRENCY workers (abandoned calls included),
+# and the pool is sized so a hung source can never starve the others.
+SEARCH_BUDGET = float(os.getenv('SEARCH_BUDGET', '4.0'))
+FANOUT_SOURCE_CONCURRENCY = int(os.getenv('FANOUT_SOURCE_CONCURRENCY', '4'))
+fanout_engine = FanoutEngine(
+    max_workers=max(int(os.getenv('FANOUT_WORKERS', '24')), FANOUT_SOURCE_CONCURRENCY * len(SOURCES)),
+    per_task_limit=FANOUT_SOURCE_CONCURRENCY
+)
+# POST /search/batch takes up to BATCH_MAX_QUERIES queries and works through them
+# BATCH_CHUNK_SIZE at a time, fanning out BATCH_CONCURRENCY queries at once. Batch
+# fan-outs share the per-source worker slots and rate limits with interactive searches.
+BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', '500'))
+BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '16'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', str(FANOUT_SOURCE_CONCURRENCY)))
+batch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch")
+# Deadlines default to the source's HTTP deadline so an abandoned worker is
+# released about when the request stops waiting for it
+SOURCE_DEADLINES = {
+    source: min(float(os.getenv(f'{source.upper()}_DEADLINE', get_policy(source)['deadline'])), SEARCH_BUDGET)
+    for source in SOURCES
+}
+
+# Opt-in deep content stage (deep=1 on a search, or DEEP_CONTENT=1 for every search):
+# the top result pages are fetched concurrently, streamed up to a byte cap, and their
+# text is blended into relevance with DEEP_CONTENT_WEIGHT.
+DEEP_CONTENT = os.getenv('DEEP_CONTENT', '0') == '1'
+DEEP_CONTENT_TOP_N = int(os.getenv('DEEP_CONTENT_TOP_N', '5'))
+DEEP_CONTENT_BUDGET = float(os.getenv('DEEP_CONTENT_BUDGET', '1.0'))
+DEEP_CONTENT_WEIGHT = float(os.getenv('DEEP_CONTENT_WEIGHT', '0.5'))
+page_fetcher = PageFetcher(
+    max_workers=int(os.getenv('PAGE_FETCH_WORKERS', '16')),
+    per_host_limit=int(os.getenv('PAGE_FETCH_PER_HOST', '2')),
+    max_bytes=int(os.getenv('PAGE_FETCH_MAX_BYTES', str(512 * 1024)))
+)
+
+# Whole-source circuit breakers: a source that keeps failing or overrunning its
+# deadline is skipped (status "circuit_open") until a half-open probe succeeds.
+# http_pool keeps finer-grained breakers per upstream host.
+source_health = HealthRegistry()
+
+# Identical searches in flight at the same time (e.g. a trending query) share one
+# fan-out and ranking pass instead of each hitting every upstream.
+search_flights = SingleFlight()
+
+# Admission control: at most MAX_ACTIVE_SEARCHES searches run at once and up to
+# MAX_QUEUED_SEARCHES more wait QUEUE_TIMEOUT seconds for a slot; the rest get a
+# fast 503 with Retry-After. Once DEGRADE_AT of the slots are busy or anything is
+# queued, searches run degraded: DEGRADED_SKIP_SOURCES are not called, YouTube
+# skips its scraping fallback, and ranking reuses the candidate scores instead of
+# embedding every result a second time.
+admission = AdmissionController(
+    max_active=int(os.getenv('MAX_ACTIVE_SEARCHES', '16')),
+    max_queued=int(os.getenv('MAX_QUEUED_SEARCHES', '32')),
+    queue_timeout=float(os.getenv('QUEUE_TIMEOUT', '1.0')),
+    degrade_at=float(os.getenv('DEGRADE_AT', '0.75'))
+)
+DEGRADED_SKIP_SOURCES = set(os.getenv('DEGRADED_SKIP_SOURCES', 'reddit').split(','))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
+
+# Prometheus metrics served on /metrics. Every search also reports its stage
+# durations in a Server-Timing header and a structured JSON log line.
+REQUEST_LOG = os.getenv('REQUEST_LOG', '1') == '1'
+metrics_registry = Registry()
+request_seconds = metrics_registry.histogram('search_request_seconds', 'End-to-end search request latency', ['endpoint', 'status'])
+stage_seconds = metrics_registry.histogram('search_stage_seconds', 'Time spent in each search stage', ['stage'])
+source_seconds = metrics_registry.histogram('search_source_seconds', 'Source adapter time split into network and parse', ['source', 'phase'])
+source_outcomes = metrics_registry.counter('search_source_status_total', 'Final status of each source per search', ['source', 'status'])
+
+def is_degraded() -> bool:
+    """Whether the request being served was admitted in degraded mode."""
+    return has_request_context() and g.get('degraded', False)
+
+def current_timings() -> Optional[StageTimings]:
+    """The stage timings of the request being served, if any."""
+    return g.get('timings') if has_request_context() else None
+
+@contextlib.contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the enclosed block as a stage of the current request."""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    with timings.stage(stage):
+        yield
+
+class SourceFailedError(Exception):
+    """Raised when a source adapter returned nothing because its upstream calls failed."""
+
+def run_source(source: str, query: str, timings: Optional[StageTimings] = None, degraded: bool = False) -> List[Dict[str, Any]]:
+    """Run one source adapter with all of its upstream calls bounded by the source deadline.
     
-    # Combine content (limit length to avoid tokenizer limits)
-    combined_text = " ".join(top_contents)
-    combined_text = combined_text[:3800]  # Limit input size for summarizer
+    Time spent inside http_pool counts as network time, the rest as parsing.
+    Degraded runs use the source's cheaper adapter when it has one. Adapters
+    return [] on errors, so a run that comes back empty after any of its
+    upstream calls failed raises SourceFailedError: the fan-out reports the
+    source as "error" and the source breaker counts the failure.
+    """
+    adapter = DEGRADED_ADAPTERS.get(source, SOURCES[source]) if degraded else SOURCES[source]
+    started = time.monotonic()
+    network_started = network_time()
+    failures_started = upstream_failures()
+    ok = False
+    try:
+        with deadline_scope(SOURCE_DEADLINES[source]):
+            results = adapter(query)
+        if not results and upstream_failures() > failures_started:
+            raise SourceFailedError(f"{source} upstream failed")
+        ok = time.monotonic() - started <= SOURCE_DEADLINES[source]
+        return results
+    finally:
+        elapsed = time.monotonic() - started
+        network = network_time() - network_started
+        source_health.record(source, ok, elapsed)
+        source_seconds.observe(network, source=source, phase="network")
+        source_seconds.observe(max(elapsed - network, 0.0), source=source, phase="parse")
+        if timings is not None:
+            timings.add_source(source, network, max(elapsed - network, 0.0))
+
+def split_available(sources: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """Split sources into those to call now and a status for the rest.
+    
+    Failing sources are "circuit_open"; sources dropped by a degraded search are "shed".
+    """
+    degraded = is_degraded()
+    available = []
+    skipped = {}
+    for source in sources:
+        if degraded and source in DEGRADED_SKIP_SOURCES:
+            skipped[source] = "shed"
+        elif source_health.allow(source):
+            available.append(source)
+        else:
+            skipped[source] = "circuit_open"
+    return available, skipped
+
+def cache_source_results(query: str, results: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Store freshly scored per-source results in the result cache."""
+    normalized = normalize_query(query)
+    for source, source_results in results.items():
+        # Empty lists usually mean an upstream error, so only real results are cached
+        if source_results:
+            result_cache.set((normalized, source), [dict(r) for r in source_results], SOURCE_TTLS[source])
+
+def fan_out(query: str, sources: List[str], budget: float = SEARCH_BUDGET) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """Fan out to the given sources and return their raw candidates and a status per source.
+    
+    Sources that miss their deadline or the overall budget, or whose circuit is
+    open, come back with no candidates.
+    """
+    sources, skipped = split_available(sources)
+    candidates, statuses = {}, {}
+    if sources:
+        print(f"Starting parallel searches: {', '.join(sources)}")
+        tasks = {source: functools.partial(run_source, source, query, current_timings(), is_degraded()) for source in sources}
+        with timed("fanout"):
+            candidates, statuses = fanout_engine.run(tasks, budget, SOURCE_DEADLINES)
+        for source in sources:
+            print(f"{source.capitalize()} candidates: {len(candidates.get(source, []))} ({statuses[source]})")
+            candidates.setdefault(source, [])
+    for source, status in skipped.items():
+        candidates[source] = []
+        statuses[source] = status
+    return candidates, statuses
+
+def fetch_sources(query: str, query_embedding: np.ndarray, sources: List[str], budget: float = SEARCH_BUDGET) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """Fan out to the given sources, score their candidates and store them in the result cache.
     
+    Returns the scored results and a status per source.
+    """
+    candidates, statuses = fan_out(query, sources, budget)
+    # Score every candidate from every source in a single encoder pass
+    with timed("score"):
+        results = score_candidates(candidates, query, query_embedding, max_results=CANDIDATES_PER_SOURCE)
+    cache_source_results(query, results)
+    return results, statuses
+
+def refresh_source(query: str, source: str) -> None:
+    """Background stale-while-revalidate refresh of one cached source."""
+    key = (normalize_query(query), source)
     try:
-        # Generate comprehensive summary
-        summary = summarizer(combined_text, max_length=250, min_length=100, do_sample=False)[0]["summary_text"]
-        
-        # Generate source-specific mini-summaries
-        source_summaries = {}
-        for source, results in all_results.items():
-            if results:
-                source_text = " ".join([r["content"] for r in results[:2]])[:1500]  # Take top 2 results
-                if len(source_text) > 200:  # Only summarize if we have enough content
-                    try:
-                        source_summary = summarizer(source_text, max_length=100, min_length=30, do_sample=False)[0]["summary_text"]
-                        source_summaries[source] = source_summary
-                    except Exception as e:
-                        print(f"Error summarizing {source} content: {e}")
-                        source_summaries[source] = results[0]["snippet"] if results[0]["snippet"] else "Summary not available."
-        
-        return {
-            "main_summary": summary,
-            "source_summaries": source_summaries
-        }
+        fetch_sources(query, get_embedding(query), [source])
     except Exception as e:
-        print(f"Error generating summary: {e}")
-        return {
-            "main_summary": f"Information about {query} could not be summarized due to an error.",
-            "source_summaries": {}
-        }
+        print(f"Error refreshing {source} for '{query}': {e}")
+    finally:
+        result_cache.end_refresh(key)
+
+def prefetch_due(query: str) -> List[str]:
+    """Upstream sources whose cached results for a normalized query are missing or expire within PREFETCH_LEAD_TIME."""
+    due = []
+    for source in SOURCES:
+        if source == 'local':
+            continue
+        remaining = result_cache.ttl_remaining((query, source))
+        if remaining is None or remaining < PREFETCH_LEAD_TIME:
+            due.append(source)
+    return due
+
+def prefetch_sources(query: str, sources: List[str]) -> None:
+    """Refresh sources for a popular query, skipping any a stale-while-revalidate refresh already holds."""
+    claimed = [source for source in sources if result_cache.start_refresh((query, source))]
+    try:
+        if claimed:
+            fetch_sources(query, get_embedding(query), claimed)
+    finally:
+        for source in claimed:
+            result_cache.end_refresh((query, source))
+
+# Background prefetch keeps popular queries warm. Searches are counted with a decaying
+# frequency (halving every PREFETCH_HALF_LIFE seconds); every PREFETCH_INTERVAL seconds
+# the PREFETCH_TOP_N most popular queries seen at least PREFETCH_MIN_COUNT times get
+# their missing or soon-expiring sources refreshed, spending at most PREFETCH_BUDGET
+# source calls per cycle. Refreshes go through the shared fan-out, so per-source rate
+# limits and worker slots apply, and they pause while searches run degraded.
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '1') == '1'
+PREFETCH_LEAD_TIME = float(os.getenv('PREFETCH_LEAD_TIME', '300'))
+prefetcher = Prefetcher(
+    due=prefetch_due,
+    refresh=prefetch_sources,
+    paused=lambda: not model_ready.is_set() or admission.under_pressure(),
+    top_n=int(os.getenv('PREFETCH_TOP_N', '50')),
+    min_count=float(os.getenv('PREFETCH_MIN_COUNT', '2')),
+    interval=float(os.getenv('PREFETCH_INTERVAL', '60')),
+    budget=int(os.getenv('PREFETCH_BUDGET', '30')),
+    min_gap=PREFETCH_LEAD_TIME,
+    half_life=float(os.getenv('PREFETCH_HALF_LIFE', '3600'))
+)
+
+def get_cached_sources(query: str) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """Return cached results per source plus the sources that must be fetched.
+    
+    Stale entries are returned as-is and refreshed in the background.
+    """
+    normalized = normalize_query(query)
+    results = {}
+    to_fetch = []
+    for source in SOURCES:
+        cached, state = result_cache.get((normalized, source))
+        if state == MISS:
+            to_fetch.append(source)
+            continue
+        # Copy so the caller can annotate results without touching the cache
+        results[source] = [dict(r) for r in cached]
+        if state == STALE and result_cache.start_refresh((normalized, source)):
+            refresh_executor.submit(refresh_source, query, source)
+    return results, to_fetch
+
+def get_source_results(query: str, query_embedding: np.ndarray, budget: float = SEARCH_BUDGET) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, str]]:
+    """Return scored results and a status for every source, serving fresh or stale entries from the cache."""
+    with timed("cache"):
+        results, to_fetch = get_cached_sources(query)
+    statuses = {source: "cached" for source in results}
+    
+    fetched, fetch_statuses = fetch_sources(query, query_embedding, to_fetch, budget)
+    results.update(fetched)
+    statuses.update(fetch_statuses)
+    return {source: results[source] for source in SOURCES}, {source: statuses[source] for source in SOURCES}
+
+def search_many(queries: List[str], query_embeddings: np.ndarray, summary: bool = False) -> List[Dict[str, Any]]:
+    """Search several queries together and return their ``/search`` payloads in order.
+    
+    The queries fan out concurrently on the batch pool. Their prefiltered
+    candidates are then embedded in one encoder pass over the distinct texts,
+    so a page returned for several queries is encoded once, and so are the
+    texts the relevance filter compares.
+    """
+    cached, to_fetch = zip(*[get_cached_sources(query) for query in queries])
+    futures = [batch_executor.submit(fan_out, query, sources) for query, sources in zip(queries, to_fetch)]
+    fetched = [future.result() for future in futures]
+    
+    candidate_texts = (
+        result.get("_text", "")
+        for query, (candidates, _) in zip(queries, fetched)
+        for pairs in prefilter_candidates(query, candidates).values()
+        for result, _ in pairs
+    )
+    with timed("embed"):
+        encode_texts(list(dict.fromkeys(text for text in candidate_texts if text.strip())))
+    
+    merged = []
+    for query, query_embedding, source_results, (candidates, fetch_statuses) in zip(queries, query_embeddings, cached, fetched):
+        with timed("score"):
+            scored = score_candidates(candidates, query, query_embedding, max_results=CANDIDATES_PER_SOURCE)
+        cache_source_results(query, scored)
+        statuses = {source: "cached" for source in source_results}
+        statuses.update(fetch_statuses)
+        results = dict(source_results, **scored)
+        merged.append(({source: results[source] for source in SOURCES}, {source: statuses[source] for source in SOURCES}))
+    
+    result_texts = (result_text(result) for results, _ in merged for source_results in results.values() for result in source_results)
+    with timed("embed"):
+        encode_texts(list(dict.fromkeys(result_texts)))
+    
+    return [
+        aggregate_results(query, query_embedding, results, statuses, summary=summary, paginate=False)
+        for query, query_embedding, (results, statuses) in zip(queries, query_embeddings, merged)
+    ]
+
+def aggregate_results(query: str, query_embedding: np.ndarray, results: Dict[str, List[Dict[str, Any]]], statuses: Dict[str, str], deep: bool = False, summary: bool = False, paginate: bool = True) -> Dict[str, Any]:
+    """Filter, dedupe and re-rank per-source results across sources into the first page of the response.
+
+    With ``deep`` the top result pages are fetched and re-scored on their full text.
+    With ``summary`` the payload also carries an extractive summary of the results.
+    With ``paginate`` the full ranked set is kept in a search session and the
+    payload carries a ``next_cursor`` for the following page.
+    """
+    # One embedding pass feeds both the relevance filter and the near-duplicate check
+    all_results = []
+    for source, source_results in results.items():
+        for result in source_results:
+            result['source'] = source
+            all_results.append(result)
+    degraded = is_degraded()
+    if degraded:
+        # Under load, rank on the scores from candidate scoring instead of embedding every result again
+        ranked_results = sorted((r for r in all_results if r.get('relevance', 0) >= 0.3), key=lambda r: r['relevance'], reverse=True)
+        embeddings = None
+    else:
+        with timed("filter"):
+            ranked_results, embeddings = filter_relevant_results(all_results, query_embedding, threshold=0.3, query=query)
+    if deep and not degraded:
+        with timed("deep"):
+            ranked_results, embeddings = deepen_results(query_embedding, ranked_results, embeddings)
+    if local_index is not None and not degraded:
+        # Grow the local corpus from what the remote sources just returned
+        indexable = [i for i, result in enumerate(ranked_results) if result['source'] in LOCAL_INDEX_SOURCES]
+        with timed("index"):
+            local_index.add([ranked_results[i] for i in indexable], embeddings[indexable])
+    with timed("dedupe"):
+        unique_results = remove_duplicates(ranked_results, embeddings, semantic=not degraded)
+    
+    # Reorganize results by source
+    organized_results = {source: [] for source in SOURCES}
+    
+    for result in unique_results:
+        source = result.pop('source')  # Remove source from result dict
+        organized_results[source].append(result)
+    
+    session_id = search_sessions.open(query, organized_results, statuses, degraded) if paginate else None
+    response_data = search_sessions.page_payload(query, organized_results, 0, session_id)
+    if summary:
+        with timed("summary"):
+            first_page = {source: response_data[source] for source in SOURCES}
+            response_data["summary"] = generate_comprehensive_summary(query, first_page, query_embedding)
+    response_data["source_status"] = statuses
+    response_data["partial"] = is_partial(statuses)
+    response_data["degraded"] = degraded
+    return response_data
+
+def wants_deep_content() -> bool:
+    """Whether this request asked for (or defaults to) the deep content stage."""
+    return request.args.get("deep", "1" if DEEP_CONTENT else "0") == "1"
+
+def requested_fields() -> Optional[frozenset]:
+    """Result fields this request asked for with ``fields=``, or None for all of them."""
+    return parse_fields(request.args.get("fields"))
+
+def shape(response_data: Dict[str, Any], fields: Optional[frozenset]) -> Dict[str, Any]:
+    """Copy of a payload with its results projected to ``fields`` and relevance rounded."""
+    return shape_payload(response_data, SOURCES, fields, RELEVANCE_DECIMALS)
+
+def json_response(data: Any) -> Response:
+    """JSON response encoded with the fast serializer."""
+    return Response(dumps(data), mimetype="application/json")
+
+def wants_summary() -> bool:
+    """Whether this request asked for an extractive summary with its results."""
+    return request.args.get("summary", "0") == "1"
+
+def search_payload(query: str, deep: bool = False, summary: bool = False) -> Dict[str, Any]:
+    """Run a full search and return its ``/search`` payload.
+    
+    Concurrent searches for the same normalized query, options and degraded
+    mode share one run: the first does the embedding, fan-out and ranking, and the others wait
+    for its payload instead of repeating the upstream calls.
+    """
+    started = time.monotonic()
+    prefetcher.record(normalize_query(query))
+    
+    def compute() -> Dict[str, Any]:
+        # Generate embedding for the query once to reuse for all searches
+        with timed("embed"):
+            query_embedding = get_embedding(query)
+        print("Generated query embedding")
+        
+        # Whatever is left of the latency budget goes to the upstream fan-out
+        remaining = SEARCH_BUDGET - (time.monotonic() - started)
+        results, statuses = get_source_results(query, query_embedding, remaining)
+        return aggregate_results(query, query_embedding, results, statuses, deep=deep, summary=summary)
+    
+    # Degraded runs shed sources and skip re-ranking, so only runs in the same mode are shared
+    response_data, shared = search_flights.do((normalize_query(query), deep, summary, is_degraded()), compute)
+    if shared:
+        timings = current_timings()
+        if timings is not None:
+            timings.add("coalesced", time.monotonic() - started)
+        # The payload is shared with the other waiters, so copy before personalizing it
+        response_data = dict(response_data, query=query)
+    return response_data
 
 @app.route("/search", methods=["GET"])
 def search():
+    cursor = request.args.get("cursor")
+    if cursor:
+        # Later pages come straight from the search session
+        response_data = search_sessions.session_page(cursor)
+        if response_data is None:
+            return jsonify({"error": "Cursor is invalid or expired, search again"}), 410
+        return json_response(shape(response_data, requested_fields()))
+    
     query = request.args.get("query", "")
     print(f"Received search query: {query}")
     
@@ -600,78 +1305,277 @@ def search():
         return jsonify({"error": "No query provided"}), 400
     
     try:
-        # Generate embedding for the query once to reuse for all searches
-        query_embedding = get_embedding(query)
-        print("Generated query embedding")
-        
-        # Run searches using ThreadPoolExecutor for parallel execution
-        with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-            print("Starting parallel searches...")
-            # Submit search tasks
-            futures = {
-                'web': executor.submit(search_web, query, query_embedding, 3),
-                'wikipedia': executor.submit(search_wikipedia, query, query_embedding, 3),
-                'arxiv': executor.submit(search_arxiv, query, query_embedding, 3),
-                'news': executor.submit(search_news, query, query_embedding, 3),
-                'reddit': executor.submit(search_reddit, query, query_embedding, 3),
-                'youtube': executor.submit(search_youtube, query, query_embedding, 3)
-            }
-            
-            # Get results
-            results = {}
-            for source, future in futures.items():
-                try:
-                    results[source] = future.result()
-                    print(f"{source.capitalize()} results: {len(results[source])}")
-                except Exception as e:
-                    print(f"Error getting {source} results: {e}")
-                    results[source] = []
-        
-        # Filter results by relevance and remove duplicates across all sources
-        all_results = []
-        for source, source_results in results.items():
-            filtered_results = filter_relevant_results(source_results, query_embedding, threshold=0.3)
-            for result in filtered_results:
-                result['source'] = source
-                all_results.append(result)
-        
-        # Remove duplicates from all results
-        unique_results = remove_duplicates(all_results)
-        
-        # Sort by relevance and organize by source
-        unique_results.sort(key=lambda x: x['relevance'], reverse=True)
-        
-        # Reorganize results by source
-        organized_results = {
-            'web': [],
-            'wikipedia': [],
-            'arxiv': [],
-            'news': [],
-            'reddit': [],
-            'youtube': []
-        }
-        
-        for result in unique_results:
-            source = result.pop('source')  # Remove source from result dict
-            if len(organized_results[source]) < 3:  # Limit to top 3 per source
-                organized_results[source].append(result)
-        
-        response_data = {
-            "query": query,
-            "web": organized_results['web'],
-            "wikipedia": organized_results['wikipedia'],
-            "arxiv": organized_results['arxiv'],
-            "news": organized_results['news'],
-            "reddit": organized_results['reddit'],
-            "youtube": organized_results['youtube']
-        }
+        response_data = search_payload(query, deep=wants_deep_content(), summary=wants_summary())
+        g.source_status = response_data["source_status"]
         
         print("Sending response...")
-        return jsonify(response_data)
+        with timed("serialize"):
+            return json_response(shape(response_data, requested_fields()))
         
     except Exception as e:
         print(f"Error in search: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.before_request
+def start_timings():
+    g.timings = StageTimings()
+
+def finish_timings(timings: StageTimings, status: int) -> None:
+    """Export one finished search to the metrics and the structured request log."""
+    elapsed = timings.elapsed()
+    source_status = g.get('source_status') or {}
+    request_seconds.observe(elapsed, endpoint=request.endpoint, status=status)
+    for stage, seconds in list(timings.stages.items()):
+        stage_seconds.observe(seconds, stage=stage)
+    for source, status_name in source_status.items():
+        source_outcomes.inc(source=source, status=status_name)
+    if REQUEST_LOG:
+        print(json.dumps({
+            "event": "search",
+            "endpoint": request.endpoint,
+            "query": request.args.get("query", ""),
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            **timings.as_dict(),
+            "source_status": source_status
+        }))
+
+@app.after_request
+def record_timings(response: Response) -> Response:
+    """Add Server-Timing to search responses and record them; streams record themselves when done."""
+    timings = current_timings()
+    if timings is None or request.endpoint not in ('search', 'search_stream', 'summary') or response.is_streamed:
+        return response
+    finish_timings(timings, response.status_code)
+    response.headers['Server-Timing'] = timings.server_timing()
+    return response
+
+@app.after_request
+def compress_response(response: Response) -> Response:
+    """Compress sizeable responses with the best coding the client accepts.
+
+    Registered after record_timings so it runs first and its time is reported.
+    Streams are left alone so every event is flushed as soon as it is ready.
+    """
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None or (response.content_length or 0) < COMPRESS_MIN_BYTES:
+        return response
+    with timed("compress"):
+        response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.before_request
+def require_model():
+    """Reject search traffic with 503 until the model is loaded and warmed up."""
+    if request.endpoint in ('healthz', 'readyz', 'stats', 'admin_health', 'metrics') or model_ready.is_set():
+        return None
+    response = jsonify({"error": "Model is still loading"})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+@app.before_request
+def admit_search():
+    """Hold search traffic to the admission limits, refusing what does not fit with a fast 503."""
+    # Cursor pages are served from memory and never need shedding
+    if request.endpoint not in ('search', 'search_stream', 'summary', 'search_batch') or request.args.get("cursor"):
+        return None
+    if not admission.acquire():
+        response = jsonify({"error": "Server is overloaded, retry shortly"})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(ADMISSION_RETRY_AFTER)
+        return response
+    g.admitted = True
+    g.degraded = admission.under_pressure()
+    return None
+
+@app.teardown_request
+def release_admission(exc: Optional[BaseException]) -> None:
+    """Free the admission slot once the response, or the whole stream, is done."""
+    if g.pop('admitted', False):
+        admission.release()
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: the model is loaded and warmed up, so search traffic can be routed here."""
+    if model_ready.is_set():
+        return jsonify({"status": "ready", "encoder": encoder.name, "backend": ENCODER_BACKEND})
+    status = "error" if model_error else "loading"
+    return jsonify({"status": status, "backend": ENCODER_BACKEND, "error": model_error}), 503
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+@app.route("/summary", methods=["GET"])
+def summary():
+    """Extractive summary of the results for a query, overall and per source."""
+    query = request.args.get("query", "")
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    
+    try:
+        response_data = search_payload(query, summary=True)
+        g.source_status = response_data["source_status"]
+        
+        with timed("serialize"):
+            return json_response({
+                "query": query,
+                **response_data["summary"],
+                "source_status": response_data["source_status"],
+                "partial": response_data["partial"]
+            })
+    except Exception as e:
+        print(f"Error in summary: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/search/stream", methods=["GET"])
+def search_stream():
+    """Stream each source's results over SSE as soon as it is ready, then the re-ranked final payload.
+    
+    Emits one ``source`` event per source (cached sources first, then fetched
+    ones in completion order) and a closing ``final`` event identical to the
+    ``/search`` response.
+    """
+    query = request.args.get("query", "")
+    print(f"Received streaming search query: {query}")
+    
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    
+    deep = wants_deep_content()
+    summary = wants_summary()
+    fields = requested_fields()
+    prefetcher.record(normalize_query(query))
+    
+    def generate():
+        started = time.monotonic()
+        statuses = {}
+        try:
+            with timed("embed"):
+                query_embedding = get_embedding(query)
+            with timed("cache"):
+                results, to_fetch = get_cached_sources(query)
+            statuses = {source: "cached" for source in results}
+            for source, source_results in results.items():
+                yield format_sse("source", {"source": source, "status": "cached", "results": shape_results(source_results[:PAGE_SIZE], fields, RELEVANCE_DECIMALS)})
+            
+            to_fetch, skipped = split_available(to_fetch)
+            for source, status in skipped.items():
+                statuses[source] = status
+                yield format_sse("source", {"source": source, "status": status, "results": []})
+            
+            remaining = SEARCH_BUDGET - (time.monotonic() - started)
+            tasks = {source: functools.partial(run_source, source, query, current_timings(), is_degraded()) for source in to_fetch}
+            for source, status, candidates in fanout_engine.stream(tasks, remaining, SOURCE_DEADLINES):
+                # Score each source on arrival so it can be shown without waiting for the others
+                with timed("score"):
+                    scored = score_candidates({source: candidates or []}, query, query_embedding, max_results=CANDIDATES_PER_SOURCE)
+                cache_source_results(query, scored)
+                results[source] = scored[source]
+                statuses[source] = status
+                yield format_sse("source", {"source": source, "status": status, "results": shape_results(scored[source][:PAGE_SIZE], fields, RELEVANCE_DECIMALS)})
+            
+            results = {source: results.get(source, []) for source in SOURCES}
+            statuses = {source: statuses.get(source, "error") for source in SOURCES}
+            final = aggregate_results(query, query_embedding, results, statuses, deep, summary)
+            with timed("serialize"):
+                frame = format_sse("final", shape(final, fields))
+            yield frame
+        except Exception as e:
+            print(f"Error in streaming search: {str(e)}")
+            yield format_sse("error", {"error": str(e)})
+        finally:
+            # Headers are long gone by now, so streams only report to metrics and the log
+            g.source_status = statuses
+            finish_timings(g.timings, 200)
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+@app.route("/search/batch", methods=["POST"])
+def search_batch():
+    """Search many queries in one call, streaming one NDJSON line per query.
+    
+    The body is ``{"queries": [...], "summary": false, "fields": [...]}``.
+    Each line is the ``/search`` payload of one query plus its ``index`` in
+    the request, in request order. All query embeddings are computed in one
+    encoder pass.
+    """
+    body = request.get_json(silent=True) or {}
+    queries = body.get("queries")
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q.strip() for q in queries):
+        return jsonify({"error": "Expected a non-empty list of query strings"}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({"error": f"At most {BATCH_MAX_QUERIES} queries per batch"}), 400
+    summary = bool(body.get("summary", False))
+    fields = parse_fields(body.get("fields"))
+    print(f"Received batch of {len(queries)} queries")
+    
+    def generate():
+        try:
+            with timed("embed"):
+                query_embeddings = encode_texts(queries)
+            for start in range(0, len(queries), BATCH_CHUNK_SIZE):
+                chunk = queries[start:start + BATCH_CHUNK_SIZE]
+                try:
+                    payloads = search_many(chunk, query_embeddings[start:start + BATCH_CHUNK_SIZE], summary)
+                except Exception as e:
+                    print(f"Error in batch search: {str(e)}")
+                    payloads = [{"query": query, "error": str(e)} for query in chunk]
+                for offset, payload in enumerate(payloads):
+                    yield dumps({"index": start + offset, **shape(payload, fields)}).decode() + "\n"
+        except Exception as e:
+            print(f"Error in batch search: {str(e)}")
+            yield dumps({"error": str(e)}).decode() + "\n"
+        finally:
+            finish_timings(g.timings, 200)
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/admin/health", methods=["GET"])
+def admin_health():
+    """Circuit breaker state, error rates and latency percentiles per source and per upstream host."""
+    return jsonify({
+        "sources": source_health.snapshot(),
+        "upstreams": upstream_health.snapshot()
+    })
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    return jsonify({
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "encoder_batching": encoder.stats() if isinstance(encoder, MicroBatcher) else None,
+        "result_cache": result_cache.stats(),
+        "http_cache": http_cache.stats() if http_cache else None,
+        "coalescing": search_flights.stats(),
+        "search_sessions": search_sessions.stats(),
+        "admission": admission.stats(),
+        "prefetch": prefetcher.stats() if PREFETCH_ENABLED else None,
+        "local_index": local_index.stats() if local_index else None
+    })
+
+if FAST_STARTUP:
+    threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+else:
+    load_model()
+
+if PREFETCH_ENABLED:
+    prefetcher.start()
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
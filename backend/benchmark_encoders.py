@@ -0,0 +1,181 @@
+"""Compare encoder backends on throughput, latency and ranking agreement.
+
+Every backend encodes the same fixed set of queries and candidate texts.
+Rankings of the candidates for each query are compared against the baseline
+backend (the current fp32 PyTorch model by default).
+
+    python benchmark_encoders.py --backends torch torch-int8 minilm
+    python encoders.py export --out onnx-mpnet
+    python benchmark_encoders.py --backends torch onnx --onnx-dir onnx-mpnet
+"""
+import argparse
+import itertools
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from encoders import BACKENDS, DEFAULT_MODEL, load_encoder
+
+# Single-text encodes timed per backend, so p95 is never just the slowest run
+MIN_LATENCY_SAMPLES = 100
+
+QUERIES = [
+    "machine learning",
+    "climate change effects on agriculture",
+    "history of the roman empire",
+    "how do vaccines work",
+    "james webb space telescope discoveries",
+    "best practices for python web development",
+    "stock market crash 2008",
+    "world cup football final",
+]
+
+CANDIDATES = [
+    "Machine learning is a field of study in artificial intelligence concerned with statistical algorithms that learn from data.",
+    "Deep Learning for Computer Vision: a survey of convolutional architectures and their training dynamics.",
+    "Ask HN: What's the best way to get started with machine learning as a web developer?",
+    "Gradient boosting machines explained with practical examples in scikit-learn and XGBoost.",
+    "Large language models are transforming how software engineers write and review code.",
+    "Reinforcement learning agents learn to play Atari games from raw pixels.",
+    "Climate change is reducing crop yields in many regions through heat stress and drought.",
+    "Rising temperatures shift growing seasons, forcing farmers to adopt drought-resistant seed varieties.",
+    "The IPCC report warns of food security risks as extreme weather events become more frequent.",
+    "Carbon capture startups raise record funding as governments tighten emission targets.",
+    "Ocean acidification threatens coral reefs and the fisheries that depend on them.",
+    "The Roman Empire was the post-Republican state of ancient Rome, ruling the Mediterranean for centuries.",
+    "Augustus became the first Roman emperor in 27 BC after defeating Mark Antony and Cleopatra.",
+    "The fall of the Western Roman Empire in 476 AD marked the end of antiquity in Europe.",
+    "Byzantine Empire: how the eastern half of Rome survived until 1453.",
+    "Documentary: Rome's greatest battles and the legions that fought them.",
+    "Vaccines train the immune system to recognize a pathogen by exposing it to a harmless antigen.",
+    "mRNA vaccines deliver instructions for cells to make a spike protein that triggers an immune response.",
+    "Herd immunity occurs when enough of a population is immune to slow the spread of a disease.",
+    "The history of smallpox eradication through global vaccination campaigns.",
+    "Antibiotic resistance is a growing threat that vaccines may help reduce.",
+    "The James Webb Space Telescope captured the deepest infrared image of the universe to date.",
+    "JWST detects carbon dioxide in the atmosphere of an exoplanet for the first time.",
+    "Webb telescope finds surprisingly massive galaxies in the early universe.",
+    "Hubble Space Telescope celebrates over thirty years of observations.",
+    "SpaceX launches another batch of Starlink satellites into low Earth orbit.",
+    "Flask and Django are the two most popular Python web frameworks for building APIs.",
+    "Structuring a large Flask application with blueprints, application factories and configuration.",
+    "Python type hints and testing with pytest improve maintainability of web backends.",
+    "Deploying Python web apps with gunicorn behind nginx: a practical guide.",
+    "JavaScript frameworks compared: React, Vue and Svelte for frontend development.",
+    "The financial crisis of 2007-2008 was triggered by the collapse of the US housing bubble.",
+    "Lehman Brothers filed for bankruptcy in September 2008, sending global markets into freefall.",
+    "The Dow Jones Industrial Average lost more than 500 points in a single day as banks failed.",
+    "Bailouts and the TARP program: how the government responded to the 2008 crash.",
+    "Cryptocurrency markets tumble as bitcoin falls below key support levels.",
+    "Argentina beat France on penalties in the 2022 FIFA World Cup final in Qatar.",
+    "Lionel Messi finally lifts the World Cup trophy after a thrilling final.",
+    "The history of the FIFA World Cup from Uruguay 1930 to today.",
+    "Premier League title race heats up as the season enters its final weeks.",
+    "Olympic marathon results and records from the Tokyo games.",
+    "A simple recipe for homemade sourdough bread with a crisp crust.",
+    "Top ten hiking trails in the Swiss Alps for summer travelers.",
+    "How to care for indoor houseplants during the winter months.",
+    "Review: the latest smartphone camera tested in low light conditions.",
+    "Understanding mortgage rates and how they affect home buyers.",
+    "Meditation and mindfulness practices for reducing stress at work.",
+    "The evolution of jazz music from New Orleans to bebop.",
+]
+
+
+def kendall_tau(a: np.ndarray, b: np.ndarray) -> float:
+    """Kendall rank correlation between two score vectors over the same items."""
+    n = len(a)
+    concordant = discordant = 0
+    for i in range(n):
+        da = np.sign(a[i] - a[i + 1:])
+        db = np.sign(b[i] - b[i + 1:])
+        product = da * db
+        concordant += int((product > 0).sum())
+        discordant += int((product < 0).sum())
+    pairs = n * (n - 1) / 2
+    return (concordant - discordant) / pairs if pairs else 1.0
+
+
+def rank_scores(encoder, batch_size: int) -> np.ndarray:
+    """Cosine score matrix of shape (queries, candidates)."""
+    query_embeddings = encoder.encode(QUERIES, batch_size=batch_size)
+    candidate_embeddings = encoder.encode(CANDIDATES, batch_size=batch_size)
+    return query_embeddings @ candidate_embeddings.T
+
+
+def benchmark(encoder, batch_size: int, repeats: int) -> Dict[str, float]:
+    """Measure batched throughput and single-text latency."""
+    encoder.encode(CANDIDATES[:batch_size], batch_size=batch_size)  # warmup
+
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        encoder.encode(CANDIDATES, batch_size=batch_size)
+        timings.append(time.perf_counter() - started)
+    throughput = len(CANDIDATES) / statistics.median(timings)
+
+    latencies = []
+    samples = max(repeats * len(QUERIES), MIN_LATENCY_SAMPLES)
+    for text in itertools.islice(itertools.cycle(QUERIES), samples):
+        started = time.perf_counter()
+        encoder.encode([text], batch_size=1)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "throughput_texts_per_s": round(throughput, 1),
+        "latency_p50_ms": round(latencies[len(latencies) // 2], 2),
+        "latency_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+    }
+
+
+def agreement(baseline: np.ndarray, scores: np.ndarray, k: int = 5) -> Dict[str, float]:
+    """Ranking agreement with the baseline: Kendall tau, top-k overlap and top-1 match, averaged over queries."""
+    taus, overlaps, top1 = [], [], []
+    for base_row, row in zip(baseline, scores):
+        taus.append(kendall_tau(base_row, row))
+        base_top = set(np.argsort(-base_row)[:k])
+        top = set(np.argsort(-row)[:k])
+        overlaps.append(len(base_top & top) / k)
+        top1.append(float(np.argmax(base_row) == np.argmax(row)))
+    return {
+        "kendall_tau": round(statistics.mean(taus), 4),
+        f"top{k}_overlap": round(statistics.mean(overlaps), 4),
+        "top1_agreement": round(statistics.mean(top1), 4),
+    }
+
+
+def main(args: argparse.Namespace) -> List[Dict[str, float]]:
+    backends = [args.baseline] + [backend for backend in args.backends if backend != args.baseline]
+    baseline_scores = None
+    report = []
+    for backend in backends:
+        started = time.perf_counter()
+        encoder = load_encoder(backend, args.model, args.onnx_dir)
+        load_seconds = time.perf_counter() - started
+
+        scores = rank_scores(encoder, args.batch_size)
+        if baseline_scores is None:
+            baseline_scores = scores
+        row = {"backend": backend, "encoder": encoder.name, "load_s": round(load_seconds, 2)}
+        row.update(benchmark(encoder, args.batch_size, args.repeats))
+        row.update(agreement(baseline_scores, scores, args.top_k))
+        report.append(row)
+        print(json.dumps(row) if args.json else "  ".join(f"{key}={value}" for key, value in row.items()))
+        del encoder
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=['torch', 'torch-int8', 'minilm'], choices=BACKENDS)
+    parser.add_argument('--baseline', default='torch', choices=BACKENDS)
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--onnx-dir', help="directory produced by `python encoders.py export`")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="print one JSON object per backend")
+    main(parser.parse_args())
@@ -0,0 +1,44 @@
+"""Vectorized near-duplicate detection and per-domain caps over ranked results."""
+import urllib.parse
+from collections import Counter
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def result_domain(url: str) -> str:
+    """Domain a result really points at, unwrapping DuckDuckGo redirect links."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.netloc.endswith("duckduckgo.com"):
+        # Redirects carry the target in uddg, whatever their path looks like
+        target = urllib.parse.parse_qs(parsed.query).get("uddg")
+        if target:
+            parsed = urllib.parse.urlparse(target[0])
+    domain = parsed.netloc.lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def dedupe_indices(keys: Sequence[str], domains: Sequence[Optional[str]], embeddings: np.ndarray,
+                   threshold: float = 0.92, max_per_domain: int = 2) -> List[int]:
+    """Return indices of the results to keep, in their original (ranked) order.
+
+    Results must be ordered best first with normalized embeddings, so the best
+    copy of a story survives. A result is dropped when its content key repeats
+    a kept one, when its cosine similarity to any kept result reaches
+    ``threshold``, or when its domain already has ``max_per_domain`` kept
+    results; a None domain is never capped. All pairwise similarities come
+    from one matrix product.
+    """
+    similarities = embeddings @ embeddings.T if len(embeddings) else np.empty((0, 0))
+    seen_keys = set()
+    domain_counts = Counter()
+    kept = []
+    for i, (key, domain) in enumerate(zip(keys, domains)):
+        if key in seen_keys or (domain is not None and domain_counts[domain] >= max_per_domain):
+            continue
+        if kept and similarities[i, kept].max() >= threshold:
+            continue
+        seen_keys.add(key)
+        domain_counts[domain] += 1
+        kept.append(i)
+    return kept
@@ -0,0 +1,177 @@
+"""Content-addressed embedding cache with an in-memory LRU tier and an optional on-disk tier."""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class EmbeddingCache:
+    """Cache of text embeddings keyed by content hash.
+
+    The memory tier is a bounded LRU of float32 vectors. The optional disk tier
+    is a memory-mapped float16 matrix (``<path>.f16``) plus an append-only index
+    file (``<path>.idx``) holding one key per line, where line ``i`` is row
+    ``i`` of the matrix. Rows are flushed to disk before their keys are appended
+    to the index, so a crash can only lose entries, never map a key to the
+    wrong vector. Once the disk tier reaches ``disk_capacity`` rows it stops
+    admitting new entries.
+
+    Only one process may write the disk tier: the first one takes an exclusive
+    lock on ``<path>.lock``. Other processes sharing the same path load the
+    existing vectors read-only and keep new ones in memory.
+    """
+
+    def __init__(self, dim: int, max_items: int = 50000, disk_path: Optional[str] = None, disk_capacity: int = 500000):
+        self.dim = dim
+        self.max_items = max_items
+        self.disk_capacity = disk_capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk_rows: Dict[str, int] = {}
+        self._disk_size = 0
+        self._matrix = None
+        self._index_file = None
+        self._lock_file = None
+        self.disk_writable = False
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path: str) -> None:
+        """Open (or create) the memory-mapped vector file and its key index."""
+        if fcntl is None:
+            print("Embedding cache disk tier needs fcntl file locking, keeping embeddings in memory only")
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        matrix_path = f"{path}.f16"
+        index_path = f"{path}.idx"
+        expected_size = self.disk_capacity * self.dim * np.dtype(np.float16).itemsize
+
+        self._lock_file = open(f"{path}.lock", "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.disk_writable = True
+        except OSError:
+            print(f"Embedding cache at {path} is owned by another process, opening it read-only")
+
+        if os.path.exists(matrix_path) and os.path.getsize(matrix_path) != expected_size:
+            if not self.disk_writable:
+                print(f"Embedding cache at {path} does not match current settings, skipping the disk tier")
+                return
+            # Dimension or capacity changed since the files were written; start over
+            print(f"Embedding cache at {path} does not match current settings, resetting")
+            os.remove(matrix_path)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+        if not os.path.exists(matrix_path) and not self.disk_writable:
+            return
+        mode = "r+" if os.path.exists(matrix_path) else "w+"
+        if not self.disk_writable:
+            mode = "r"
+        self._matrix = np.memmap(matrix_path, dtype=np.float16, mode=mode, shape=(self.disk_capacity, self.dim))
+
+        if os.path.exists(index_path):
+            with open(index_path, "r") as f:
+                for row, line in enumerate(f):
+                    if row >= self.disk_capacity or not line.endswith("\n"):
+                        # A torn last line means the write was interrupted; drop it
+                        break
+                    self._disk_rows[line.strip()] = row
+                    self._disk_size = row + 1
+        if self.disk_writable:
+            if os.path.exists(index_path) and os.path.getsize(index_path) > 0:
+                # Truncate anything past the last complete line before appending
+                with open(index_path, "r+") as f:
+                    f.truncate(sum(len(line) for _, line in zip(range(self._disk_size), f)))
+            self._index_file = open(index_path, "a")
+        print(f"Embedding cache loaded {len(self._disk_rows)} vectors from {path}")
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for keys, returning None for misses."""
+        vectors = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                elif key in self._disk_rows:
+                    vector = np.asarray(self._matrix[self._disk_rows[key]], dtype=np.float32)
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                vectors.append(vector)
+        return vectors
+
+    def put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Store vectors in the memory tier and, if this process owns it, the disk tier."""
+        with self._lock:
+            new_keys = []
+            for key, vector in zip(keys, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                if self.disk_writable and key not in self._disk_rows and self._disk_size < self.disk_capacity:
+                    self._matrix[self._disk_size] = vector.astype(np.float16)
+                    self._disk_rows[key] = self._disk_size
+                    self._disk_size += 1
+                    new_keys.append(key)
+            if new_keys:
+                # Rows must be on disk before the index points at them
+                self._matrix.flush()
+                self._index_file.write("".join(key + "\n" for key in new_keys))
+                self._index_file.flush()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def flush(self) -> None:
+        """Flush pending disk writes."""
+        with self._lock:
+            if self.disk_writable:
+                self._matrix.flush()
+                self._index_file.flush()
+
+    def close(self) -> None:
+        """Flush and release the disk tier so another process can take it over."""
+        self.flush()
+        with self._lock:
+            if self._index_file is not None:
+                self._index_file.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+            self._matrix = None
+            self._index_file = None
+            self._lock_file = None
+            self._disk_rows = {}
+            self.disk_writable = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": len(self._disk_rows),
+            }
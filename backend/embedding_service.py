@@ -0,0 +1,225 @@
+"""Cross-request micro-batching for the sentence encoder, in-process or as a shared worker process.
+
+``MicroBatcher`` wraps any encoder and merges ``encode`` calls from concurrent
+request threads into one forward pass. ``EncoderServer`` runs a batched
+encoder in its own process, and ``RemoteEncoder`` lets every web worker share
+it, so the model is loaded once per host instead of once per worker.
+
+    export EMBED_SERVICE_AUTHKEY=$(python -c 'import secrets; print(secrets.token_hex(32))')
+    python embedding_service.py serve --address 127.0.0.1:7600 --backend torch
+    EMBED_SERVICE_ADDRESS=127.0.0.1:7600 python app.py
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+from encoders import BACKENDS, DEFAULT_MODEL, load_encoder
+
+# Shortest EMBED_SERVICE_AUTHKEY accepted
+MIN_AUTHKEY_LENGTH = 16
+
+
+def load_authkey() -> bytes:
+    """The shared secret from EMBED_SERVICE_AUTHKEY.
+
+    Connections exchange pickles, so whoever holds the key can run code in the
+    encoder process. There is deliberately no default; a missing or short key
+    raises ValueError.
+    """
+    authkey = os.getenv('EMBED_SERVICE_AUTHKEY', '')
+    if len(authkey) < MIN_AUTHKEY_LENGTH:
+        raise ValueError(f"EMBED_SERVICE_AUTHKEY must be set to a secret of at least {MIN_AUTHKEY_LENGTH} characters")
+    return authkey.encode()
+
+
+class MicroBatcher:
+    """Encoder wrapper that batches concurrent ``encode`` calls across threads.
+
+    One dispatcher thread owns the wrapped encoder. It takes the first waiting
+    call, keeps collecting calls until ``max_batch_size`` texts are queued or
+    ``max_wait`` seconds have passed, encodes them in a single pass and hands
+    each caller its own rows. A call larger than ``max_batch_size`` is still
+    encoded whole, in forward passes of ``batch_size``.
+    """
+
+    def __init__(self, encoder, max_batch_size: int = 64, max_wait: float = 0.005, batch_size: int = 32):
+        self.encoder = encoder
+        self.name = encoder.name
+        self.dim = encoder.dim
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_size = batch_size
+        self.batches = 0
+        self.calls = 0
+        self.texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, name="encoder-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """Encode texts as part of the next micro-batch; blocks until its rows are ready."""
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        pending = [self._queue.get()]
+        total = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while total < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(item)
+            total += len(item[0])
+        return pending
+
+    def _dispatch(self) -> None:
+        while True:
+            pending = self._collect()
+            texts = [text for call_texts, _ in pending for text in call_texts]
+            try:
+                embeddings = self.encoder.encode(texts, batch_size=self.batch_size)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.calls += len(pending)
+            self.texts += len(texts)
+            start = 0
+            for call_texts, future in pending:
+                future.set_result(embeddings[start:start + len(call_texts)])
+                start += len(call_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters."""
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "texts": self.texts,
+            "mean_batch_texts": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "mean_batch_calls": round(self.calls / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """``host:port`` becomes a TCP address; anything else is a Unix socket path."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+class EncoderServer:
+    """Serves a batched encoder to ``RemoteEncoder`` clients, one thread per connection."""
+
+    def __init__(self, encoder, address: str, authkey: bytes):
+        if len(authkey or b'') < MIN_AUTHKEY_LENGTH:
+            raise ValueError("Refusing to serve the encoder without a secret authkey")
+        self.encoder = encoder
+        self.listener = Listener(parse_address(address), authkey=authkey)
+
+    def serve_forever(self) -> None:
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return  # listener closed
+            except Exception as e:
+                print(f"Encoder server rejected a connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection) -> None:
+        with connection:
+            while True:
+                try:
+                    command, payload = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if command == 'info':
+                        reply = {'name': self.encoder.name, 'dim': self.encoder.dim}
+                    elif command == 'encode':
+                        reply = self.encoder.encode(payload)
+                    else:
+                        raise ValueError(f"Unknown encoder server command '{command}'")
+                    connection.send(('ok', reply))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    connection.send(('error', str(e)))
+
+    def close(self) -> None:
+        self.listener.close()
+
+
+class RemoteEncoder:
+    """Encoder interface backed by an ``EncoderServer``; each thread keeps its own connection."""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = parse_address(address)
+        self.authkey = authkey
+        self._local = threading.local()
+        info = self._call('info', None)
+        self.name = info['name']
+        self.dim = info['dim']
+
+    def _call(self, command: str, payload: Any) -> Any:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = Client(self.address, authkey=self.authkey)
+        try:
+            connection.send((command, payload))
+            status, reply = connection.recv()
+        except (EOFError, OSError):
+            # The server restarted or dropped us; reconnect on the next call
+            connection.close()
+            self._local.connection = None
+            raise
+        if status != 'ok':
+            raise RuntimeError(f"Encoder server error: {reply}")
+        return reply
+
+    def encode(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return self._call('encode', list(texts))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve one micro-batched encoder to every web worker on this host.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help="load the encoder and serve encode requests")
+    serve_parser.add_argument('--address', default=os.getenv('EMBED_SERVICE_ADDRESS', '127.0.0.1:7600'),
+                              help="host:port or a Unix socket path")
+    serve_parser.add_argument('--backend', default=os.getenv('ENCODER_BACKEND', 'torch'), choices=BACKENDS)
+    serve_parser.add_argument('--model', default=os.getenv('MODEL_NAME', DEFAULT_MODEL))
+    serve_parser.add_argument('--onnx-dir', default=os.getenv('ONNX_MODEL_DIR'))
+    serve_parser.add_argument('--max-batch-size', type=int, default=int(os.getenv('EMBED_MICROBATCH_SIZE', '64')))
+    serve_parser.add_argument('--max-wait-ms', type=float, default=float(os.getenv('EMBED_MICROBATCH_WAIT_MS', '5')))
+    args = parser.parse_args()
+    try:
+        authkey = load_authkey()
+    except ValueError as e:
+        parser.error(str(e))
+
+    batcher = MicroBatcher(load_encoder(args.backend, args.model, args.onnx_dir),
+                           max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000)
+    server = EncoderServer(batcher, args.address, authkey=authkey)
+    batcher.encode(["warmup"])
+    print(f"Serving encoder {batcher.name} on {args.address}")
+    server.serve_forever()
@@ -0,0 +1,138 @@
+"""Pluggable sentence encoder backends.
+
+Every backend exposes ``name``, ``dim`` and ``encode(texts, batch_size)``,
+which returns L2-normalized float32 embeddings, so cosine similarity is a dot
+product whichever backend is active.
+
+Backends:
+    torch       the SentenceTransformer model in fp32 PyTorch (default)
+    torch-int8  the same model with dynamic int8 quantization of its Linear layers
+    onnx        an exported ONNX Runtime model (see ``python encoders.py export``)
+    minilm      the smaller distilled all-MiniLM-L6-v2 model in PyTorch
+"""
+import argparse
+import json
+import os
+from typing import List
+
+import numpy as np
+
+DEFAULT_MODEL = 'sentence-transformers/all-mpnet-base-v2'
+MINILM_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+BACKENDS = ('torch', 'torch-int8', 'onnx', 'minilm')
+
+
+class SentenceTransformerEncoder:
+    """SentenceTransformer in PyTorch, optionally with dynamic int8 quantization."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, quantize: bool = False):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu' if quantize else None)
+        if quantize:
+            import torch
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.name = f"{model_name.split('/')[-1]}{'-int8' if quantize else ''}"
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+
+class OnnxEncoder:
+    """Exported transformer run with ONNX Runtime, followed by mean pooling and normalization."""
+
+    def __init__(self, model_dir: str):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("The onnx encoder backend requires onnxruntime (pip install onnxruntime)")
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, 'encoder_config.json')) as f:
+            config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(os.path.join(model_dir, 'model.onnx'), options,
+                                                    providers=['CPUExecutionProvider'])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.max_length = config['max_length']
+        self.name = f"{config['model_name'].split('/')[-1]}-onnx"
+        self.dim = config['dim']
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors='np')
+            inputs = {name: value.astype(np.int64) for name, value in tokens.items() if name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            mask = tokens['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled)
+        embeddings = np.vstack(batches)
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+def load_encoder(backend: str, model_name: str = DEFAULT_MODEL, onnx_dir: str = None):
+    """Create the encoder for a backend name."""
+    if backend == 'torch':
+        return SentenceTransformerEncoder(model_name)
+    if backend == 'torch-int8':
+        return SentenceTransformerEncoder(model_name, quantize=True)
+    if backend == 'minilm':
+        return SentenceTransformerEncoder(MINILM_MODEL)
+    if backend == 'onnx':
+        if not onnx_dir:
+            raise ValueError("The onnx encoder backend needs ONNX_MODEL_DIR pointing at an exported model")
+        return OnnxEncoder(onnx_dir)
+    raise ValueError(f"Unknown encoder backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+
+def export_onnx(model_name: str, output_dir: str, opset: int = 14) -> None:
+    """Export a SentenceTransformer's transformer to ONNX along with its tokenizer."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0]
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+    os.makedirs(output_dir, exist_ok=True)
+
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            os.path.join(output_dir, 'model.onnx'),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, 'encoder_config.json'), 'w') as f:
+        json.dump({
+            'model_name': model_name,
+            'max_length': st_model.max_seq_length,
+            'dim': st_model.get_sentence_embedding_dimension(),
+        }, f, indent=2)
+    print(f"Exported {model_name} to {output_dir}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a sentence encoder to ONNX for the onnx backend.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="export a SentenceTransformer model to ONNX")
+    export_parser.add_argument('--model', default=DEFAULT_MODEL)
+    export_parser.add_argument('--out', required=True, help="output directory for model.onnx and tokenizer files")
+    export_parser.add_argument('--opset', type=int, default=14)
+    args = parser.parse_args()
+    export_onnx(args.model, args.out, args.opset)
@@ -0,0 +1,127 @@
+"""Asyncio fan-out engine that runs blocking source calls under per-source and global deadlines."""
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+class FanoutEngine:
+    """Runs source calls concurrently on one shared, bounded thread pool.
+
+    A single event loop in a background thread schedules the calls, applies a
+    deadline to each one and a global budget to the whole fan-out. When the
+    budget runs out the finished sources are returned and the rest are marked
+    as timed out.
+
+    A timed-out call cannot be interrupted, so its thread runs on until the
+    callable returns; callers should bound their own blocking time. Each task
+    name may hold at most ``per_task_limit`` threads, counting abandoned calls
+    that are still running, so one hung upstream cannot occupy the whole pool.
+    With ``max_workers >= per_task_limit * number of names`` it never starves
+    the others.
+    """
+
+    def __init__(self, max_workers: int = 24, per_task_limit: int = 4):
+        self.per_task_limit = per_task_limit
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fanout-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, tasks: Dict[str, Callable[[], Any]], budget: float,
+            deadlines: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Run tasks concurrently and return ``(results, statuses)`` within ``budget`` seconds.
+
+        ``results`` only holds tasks that finished successfully; ``statuses``
+        maps every task to OK, TIMEOUT or ERROR.
+        """
+        if not tasks:
+            return {}, {}
+        coroutine = self._gather(tasks, budget, deadlines or {})
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def stream(self, tasks: Dict[str, Callable[[], Any]], budget: float,
+               deadlines: Optional[Dict[str, float]] = None) -> Iterator[Tuple[str, str, Any]]:
+        """Yield ``(name, status, result)`` for each task as soon as it finishes.
+
+        Tasks still running when ``budget`` expires are yielded last with a
+        TIMEOUT status and a None result.
+        """
+        if not tasks:
+            return
+        events = queue.Queue()
+        asyncio.run_coroutine_threadsafe(self._stream(tasks, budget, deadlines or {}, events), self._loop)
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
+
+    async def _call(self, name: str, fn: Callable[[], Any], deadline: Optional[float]) -> Any:
+        # Waiting for a free slot counts against the deadline too
+        return await asyncio.wait_for(self._run_limited(name, fn), timeout=deadline)
+
+    async def _run_limited(self, name: str, fn: Callable[[], Any]) -> Any:
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(self.per_task_limit)
+        await semaphore.acquire()
+        try:
+            future = self._executor.submit(fn)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is freed when the thread finishes, not when the caller gives up on it
+        future.add_done_callback(lambda _: self._loop.call_soon_threadsafe(semaphore.release))
+        return await asyncio.wrap_future(future)
+
+    def _start(self, tasks: Dict[str, Callable[[], Any]], deadlines: Dict[str, float]) -> Dict[asyncio.Future, str]:
+        return {asyncio.ensure_future(self._call(name, fn, deadlines.get(name))): name for name, fn in tasks.items()}
+
+    @staticmethod
+    def _outcome(name: str, task: asyncio.Future) -> Tuple[str, Any]:
+        """Translate a finished (or cancelled) task into ``(status, result)``."""
+        if task.cancelled():
+            return TIMEOUT, None
+        error = task.exception()
+        if error is None:
+            return OK, task.result()
+        if isinstance(error, asyncio.TimeoutError):
+            return TIMEOUT, None
+        print(f"Error getting {name} results: {error}")
+        return ERROR, None
+
+    async def _gather(self, tasks: Dict[str, Callable[[], Any]], budget: float,
+                      deadlines: Dict[str, float]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        pending = self._start(tasks, deadlines)
+        done, not_done = await asyncio.wait(pending, timeout=max(budget, 0))
+        for task in not_done:
+            task.cancel()
+
+        results = {}
+        statuses = {}
+        for task, name in pending.items():
+            statuses[name], result = self._outcome(name, task) if task in done else (TIMEOUT, None)
+            if statuses[name] == OK:
+                results[name] = result
+        return results, statuses
+
+    async def _stream(self, tasks: Dict[str, Callable[[], Any]], budget: float,
+                      deadlines: Dict[str, float], events: queue.Queue) -> None:
+        pending = self._start(tasks, deadlines)
+        for task, name in pending.items():
+            task.add_done_callback(lambda t, name=name: events.put((name,) + self._outcome(name, t)))
+        try:
+            _, not_done = await asyncio.wait(pending, timeout=max(budget, 0))
+            for task in not_done:
+                task.cancel()
+            # Let the cancellations run their done callbacks before closing the stream
+            await asyncio.gather(*not_done, return_exceptions=True)
+        finally:
+            events.put(None)
@@ -0,0 +1,163 @@
+"""Rolling health statistics and circuit breakers for upstream sources."""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Defaults for every breaker; override with BREAKER_<FIELD>, e.g. BREAKER_COOLDOWN=60
+DEFAULT_SETTINGS = {
+    'window': 60.0,         # seconds of outcomes the error rate is computed over
+    'min_calls': 5,         # outcomes needed in the window before the breaker may open
+    'failure_rate': 0.5,    # error rate at which it opens
+    'cooldown': 30.0,       # seconds open before a half-open probe is let through
+    'max_cooldown': 300.0,  # cap for the cooldown, which doubles on every failed probe
+}
+
+
+def breaker_settings() -> Dict[str, float]:
+    """Resolve breaker settings from defaults and environment."""
+    settings = dict(DEFAULT_SETTINGS)
+    for field, value in settings.items():
+        env_value = os.getenv(f"BREAKER_{field.upper()}")
+        if env_value:
+            settings[field] = type(value)(env_value)
+    return settings
+
+
+def percentile(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class CircuitBreaker:
+    """Tracks recent outcomes of one upstream and decides whether to call it.
+
+    Closed: every call goes through. When at least ``min_calls`` outcomes in
+    the last ``window`` seconds fail at ``failure_rate`` or more, the breaker
+    opens and calls are refused for ``cooldown`` seconds. It then turns
+    half-open and lets one probe through: success closes it, failure reopens
+    it with the cooldown doubled (up to ``max_cooldown``).
+    """
+
+    def __init__(self, name: str, window: float = 60.0, min_calls: int = 5, failure_rate: float = 0.5,
+                 cooldown: float = 30.0, max_cooldown: float = 300.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probe_started = None
+        self.refused = 0
+        self.total_calls = 0
+        self.total_failures = 0
+        self._samples = deque(maxlen=1000)  # (time, ok, latency)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time is allowed."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.probe_started = None
+            # A probe that never reported back (abandoned call) is replaced after a cooldown
+            if self.state == HALF_OPEN and (self.probe_started is None or now - self.probe_started >= self.cooldown):
+                self.probe_started = now
+                return True
+            self.refused += 1
+            return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record the outcome of a call that was allowed."""
+        with self._lock:
+            now = time.monotonic()
+            self.total_calls += 1
+            self.total_failures += 0 if ok else 1
+            self._samples.append((now, ok, latency))
+            if self.state == HALF_OPEN:
+                if ok:
+                    self.state = CLOSED
+                    self.cooldown = self.base_cooldown
+                    self._samples.clear()
+                else:
+                    self._open(now, min(self.cooldown * 2, self.max_cooldown))
+                return
+            if self.state == CLOSED and not ok:
+                recent = self._recent(now)
+                failures = sum(1 for _, sample_ok, _ in recent if not sample_ok)
+                if len(recent) >= self.min_calls and failures / len(recent) >= self.failure_rate:
+                    self._open(now, self.base_cooldown)
+
+    def _open(self, now: float, cooldown: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.cooldown = cooldown
+        self.probe_started = None
+        print(f"Circuit for {self.name} opened for {cooldown:.0f}s")
+
+    def _recent(self, now: float):
+        return [sample for sample in self._samples if now - sample[0] <= self.window]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state with the window's error rate and latency percentiles in milliseconds."""
+        with self._lock:
+            now = time.monotonic()
+            recent = self._recent(now)
+            latencies = sorted(latency * 1000 for _, _, latency in recent)
+            failures = sum(1 for _, ok, _ in recent if not ok)
+            p50, p95, p99 = (percentile(latencies, fraction) for fraction in (0.5, 0.95, 0.99))
+            return {
+                "state": self.state,
+                "window_calls": len(recent),
+                "error_rate": round(failures / len(recent), 4) if recent else 0.0,
+                "latency_p50_ms": round(p50, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95, 1) if p95 is not None else None,
+                "latency_p99_ms": round(p99, 1) if p99 is not None else None,
+                "retry_in_s": round(max(self.opened_at + self.cooldown - now, 0), 1) if self.state == OPEN else None,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "refused": self.refused,
+            }
+
+
+class HealthRegistry:
+    """Named circuit breakers created on first use, bounded to ``max_items`` (least recently used go first)."""
+
+    def __init__(self, max_items: int = 1000, **settings: float):
+        self.max_items = max_items
+        self.settings = settings or breaker_settings()
+        self._breakers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self.settings)
+                while len(self._breakers) > self.max_items:
+                    self._breakers.popitem(last=False)
+            self._breakers.move_to_end(name)
+            return breaker
+
+    def allow(self, name: str) -> bool:
+        return self.get(name).allow()
+
+    def record(self, name: str, ok: bool, latency: float) -> None:
+        self.get(name).record(ok, latency)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {name: breaker.snapshot() for name, breaker in sorted(breakers)}
@@ -0,0 +1,178 @@
+"""Persistent, size-bounded cache of raw upstream HTTP responses with revalidation support.
+
+Bodies live in a sqlite database keyed by the normalized request URL, with
+their ETag and Last-Modified validators so an expired entry can be
+revalidated with a conditional request instead of downloaded again. The
+least recently used entries are evicted once the bodies exceed ``max_bytes``.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers worth replaying from the cache
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+
+def cache_key(url: str, params: Any = None) -> str:
+    """Key for a GET of ``url`` with ``params``, independent of parameter order."""
+    prepared = requests.Request("GET", url, params=params).prepare().url
+    parts = urllib.parse.urlsplit(prepared)
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    normalized = urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+    # Hashed so API keys in query strings are never written to disk
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def cache_directives(headers: Any) -> set:
+    """Lowercased Cache-Control directive names, e.g. {"no-store", "max-age"}."""
+    return {part.split("=")[0].strip().lower() for part in (headers.get("Cache-Control") or "").split(",") if part.strip()}
+
+
+class CachedEntry:
+    """One stored response."""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, expires_at: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers that revalidate this entry."""
+        conditional = {}
+        if self.headers.get("ETag"):
+            conditional["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = self.headers["Last-Modified"]
+        return conditional
+
+    def to_response(self, url: str) -> requests.Response:
+        """A requests.Response replaying the stored body, marked ``from_cache``."""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+
+class HTTPCache:
+    """sqlite-backed response store shared by all threads (and processes) using ``path``."""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB, "
+            "size INTEGER, expires_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0
+        self.stale_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        """The stored entry, fresh or not, counted as a hit, a stale hit or a miss."""
+        with self._lock:
+            row = self._db.execute("SELECT status, headers, body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            entry = CachedEntry(row[0], json.loads(row[1]), row[2], row[3])
+            if entry.fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return entry
+
+    def store(self, key: str, response: requests.Response, ttl: float) -> None:
+        """Store a 200 response for ``ttl`` seconds, unless it forbids storing."""
+        if response.status_code != 200 or "no-store" in cache_directives(response.headers):
+            return
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status_code, json.dumps(headers), body, len(body), now + self._lifetime(response, ttl), now),
+            )
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            self.stores += 1
+            self._evict()
+
+    def revalidate(self, key: str, entry: CachedEntry, response: requests.Response, ttl: float) -> CachedEntry:
+        """Renew an entry after a 304, taking any updated validators from it."""
+        for name in STORED_HEADERS:
+            if name in response.headers:
+                entry.headers[name] = response.headers[name]
+        entry.expires_at = time.time() + self._lifetime(response, ttl)
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET headers = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                (json.dumps(entry.headers), entry.expires_at, time.time(), key),
+            )
+            self.revalidated += 1
+        return entry
+
+    @staticmethod
+    def _lifetime(response: requests.Response, ttl: float) -> float:
+        # no-cache allows storing but demands revalidation on every use
+        return 0.0 if "no-cache" in cache_directives(response.headers) else ttl
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            evicted = []
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._total_bytes -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            items = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "stores": self.stores,
+                "items": items,
+                "bytes": self._total_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
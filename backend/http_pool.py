@@ -0,0 +1,324 @@
+"""Shared per-source HTTP sessions with keep-alive, pool limits, timeouts, deadline-bounded retries and circuit breakers."""
+import contextlib
+import copy
+import hashlib
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from health import HealthRegistry
+from http_cache import HTTPCache, cache_key
+
+# Defaults for every source; override globally with HTTP_<FIELD> or per source
+# with <SOURCE>_HTTP_<FIELD>, e.g. REDDIT_HTTP_READ_TIMEOUT=4. ``deadline`` is
+# the wall-clock cap on one call including its retries and backoff, and must
+# stay below the search budget so an abandoned call frees its worker in time.
+# ``rate_limit`` caps requests per second to the source across all callers
+# (0 disables it), with bursts of up to ``burst`` requests. GET responses are
+# kept in the response cache (when one is enabled) for ``cache_ttl`` seconds
+# and revalidated with ETag/Last-Modified afterwards; 0 disables caching.
+DEFAULT_POLICY = {
+    'pool_size': 10,
+    'connect_timeout': 1.5,
+    'read_timeout': 3.0,
+    'max_retries': 1,
+    'backoff_factor': 0.2,
+    'deadline': 3.5,
+    'rate_limit': 0.0,
+    'burst': 5,
+    'cache_ttl': 0.0,
+}
+
+# Per-source adjustments to the defaults
+SOURCE_POLICIES = {
+    'wikipedia': {'read_timeout': 2.5, 'deadline': 3.0, 'cache_ttl': 3600.0},
+    'arxiv': {'read_timeout': 2.5, 'deadline': 3.0, 'cache_ttl': 3600.0},
+    'news': {'read_timeout': 2.5, 'deadline': 3.0},
+    'reddit': {'read_timeout': 2.0, 'max_retries': 0, 'deadline': 2.5},
+    'youtube': {'read_timeout': 2.0, 'max_retries': 0, 'deadline': 3.0, 'cache_ttl': 1800.0},
+    'web': {'read_timeout': 2.5, 'deadline': 3.0},
+    'pages': {'pool_size': 20, 'read_timeout': 3.0, 'max_retries': 0, 'deadline': 3.0},
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Statuses that count against an upstream's health: rejected keys, exhausted quotas and server errors
+FAILURE_STATUSES = (401, 403, 429)
+
+# One breaker per (source, host), so a dead fallback host does not trip its primary
+upstream_health = HealthRegistry()
+
+_sessions: Dict[str, requests.Session] = {}
+_buckets: Dict[str, 'TokenBucket'] = {}
+_policies: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+_context = threading.local()
+
+# Persistent cache of raw GET responses, off until enable_response_cache() is called
+response_cache: Optional[HTTPCache] = None
+# Parsed bodies, keyed by parser and body hash, so cache hits also skip parsing
+PARSED_CACHE_SIZE = int(os.getenv('HTTP_PARSED_CACHE_SIZE', '1024'))
+_parsed: 'OrderedDict[tuple, Any]' = OrderedDict()
+_parsed_lock = threading.Lock()
+
+T = TypeVar('T')
+
+
+def get_policy(source: str) -> Dict[str, float]:
+    """Resolve the connection policy for a source from defaults, overrides and environment."""
+    if source in _policies:
+        return _policies[source]
+    policy = dict(DEFAULT_POLICY)
+    policy.update(SOURCE_POLICIES.get(source, {}))
+    for field, value in policy.items():
+        env_value = os.getenv(f"{source.upper()}_HTTP_{field.upper()}") or os.getenv(f"HTTP_{field.upper()}")
+        if env_value:
+            policy[field] = type(value)(env_value)
+    _policies[source] = policy
+    return policy
+
+
+def get_session(source: str) -> requests.Session:
+    """Return the shared keep-alive session for a source, creating it on first use."""
+    session = _sessions.get(source)
+    if session is not None:
+        return session
+    with _lock:
+        if source not in _sessions:
+            policy = get_policy(source)
+            # Retries are done in request() so they can be bounded by the deadline
+            adapter = HTTPAdapter(pool_connections=policy['pool_size'], pool_maxsize=policy['pool_size'], max_retries=0)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[source] = session
+        return _sessions[source]
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    """Cap every request made by this thread inside the block to finish within ``seconds``.
+
+    Used around a whole source adapter so sequential calls (fallbacks, follow-up
+    lookups) share one deadline. Nested scopes keep the tighter deadline.
+    """
+    previous = getattr(_context, 'deadline_at', None)
+    deadline_at = time.monotonic() + seconds
+    _context.deadline_at = deadline_at if previous is None else min(previous, deadline_at)
+    try:
+        yield
+    finally:
+        _context.deadline_at = previous
+
+
+def network_time() -> float:
+    """Total seconds this thread has spent in request(), for splitting network from parse time."""
+    return getattr(_context, 'network_time', 0.0)
+
+
+def upstream_failures() -> int:
+    """Upstream calls by this thread so far that failed, were refused by an open circuit or were rate limited.
+
+    Adapters swallow their errors, so callers compare this before and after
+    running one to tell an empty answer from a failed upstream.
+    """
+    return getattr(_context, 'upstream_failures', 0)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current thread's deadline scope, or None outside one."""
+    deadline_at = getattr(_context, 'deadline_at', None)
+    return None if deadline_at is None else deadline_at - time.monotonic()
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class RateLimitedError(requests.RequestException):
+    """Raised when a source's rate limit leaves no request slot before the deadline."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds (forever if None) for it."""
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if give_up_at is not None and now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+
+def get_bucket(source: str) -> Optional[TokenBucket]:
+    """The shared rate limiter of a source, or None when its rate is unlimited."""
+    if source not in _buckets:
+        policy = get_policy(source)
+        with _lock:
+            if source not in _buckets:
+                rate = policy['rate_limit']
+                _buckets[source] = TokenBucket(rate, max(policy['burst'], 1)) if rate > 0 else None
+    return _buckets[source]
+
+
+def enable_response_cache(cache: Optional[HTTPCache]) -> None:
+    """Serve cacheable GETs through ``cache`` (None turns the response cache off)."""
+    global response_cache
+    response_cache = cache
+
+
+def request(source: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Issue a request, answering GETs to sources with a ``cache_ttl`` from the response cache.
+
+    A fresh cached response is returned without touching the network or the
+    source's breaker. A stale one is revalidated with If-None-Match /
+    If-Modified-Since, and a 304 answer renews and returns the cached body.
+    Cached responses carry ``from_cache = True``.
+    """
+    cache = response_cache
+    ttl = get_policy(source)['cache_ttl']
+    if cache is None or method != 'GET' or ttl <= 0 or kwargs.get('stream'):
+        return _upstream_request(source, method, url, **kwargs)
+    key = cache_key(url, kwargs.get('params'))
+    entry = cache.get(key)
+    if entry is not None and entry.fresh:
+        return entry.to_response(url)
+    if entry is not None and entry.validators:
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **entry.validators}
+    response = _upstream_request(source, method, url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        response.close()
+        return cache.revalidate(key, entry, response, ttl).to_response(url)
+    cache.store(key, response, ttl)
+    return response
+
+
+def http_get_parsed(source: str, url: str, parse: Callable[[requests.Response], T], **kwargs: Any) -> T:
+    """GET ``url`` and return ``parse(response)``, reusing the parse of an identical earlier body.
+
+    Error responses are always handed to ``parse``. Cached values are
+    deep-copied out, so callers may modify what they get back.
+    """
+    response = http_get(source, url, **kwargs)
+    if response.status_code != 200:
+        return parse(response)
+    key = (parse.__module__, parse.__qualname__, hashlib.sha1(response.content).hexdigest())
+    with _parsed_lock:
+        if key in _parsed:
+            _parsed.move_to_end(key)
+            return copy.deepcopy(_parsed[key])
+    value = parse(response)
+    with _parsed_lock:
+        _parsed[key] = value
+        while len(_parsed) > PARSED_CACHE_SIZE:
+            _parsed.popitem(last=False)
+    return copy.deepcopy(value)
+
+
+def _upstream_request(source: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Issue a request through the source's pooled session within its deadline.
+
+    Connection failures and retryable statuses are retried with exponential
+    backoff while the deadline allows. Read timeouts are never retried. Every
+    attempt's (connect, read) timeouts are clipped to the time left, so the
+    call cannot outlive the source deadline by more than one socket read.
+
+    Upstreams (source and host) that keep failing are skipped: while their
+    circuit is open the call raises CircuitOpenError at once. Attempts to a
+    rate-limited source wait for a slot, and raise RateLimitedError if none
+    frees up within the deadline.
+    """
+    upstream = f"{source}:{urllib.parse.urlparse(url).netloc}"
+    breaker = upstream_health.get(upstream)
+    if not breaker.allow():
+        _context.upstream_failures = upstream_failures() + 1
+        raise CircuitOpenError(f"{upstream} is failing, circuit open")
+    started = time.monotonic()
+    try:
+        response = _request(source, method, url, **kwargs)
+    except RateLimitedError:
+        # Our own throttling says nothing about the upstream's health
+        _context.upstream_failures = upstream_failures() + 1
+        raise
+    except requests.RequestException:
+        breaker.record(False, time.monotonic() - started)
+        _context.upstream_failures = upstream_failures() + 1
+        raise
+    finally:
+        _context.network_time = network_time() + time.monotonic() - started
+    failed = response.status_code in FAILURE_STATUSES or response.status_code >= 500
+    breaker.record(not failed, time.monotonic() - started)
+    if failed:
+        _context.upstream_failures = upstream_failures() + 1
+    return response
+
+
+def _request(source: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+    policy = get_policy(source)
+    deadline_at = time.monotonic() + policy['deadline']
+    scope = remaining_time()
+    if scope is not None:
+        deadline_at = min(deadline_at, time.monotonic() + scope)
+    timeout = kwargs.pop('timeout', None) or (policy['connect_timeout'], policy['read_timeout'])
+    connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    session = get_session(source)
+    bucket = get_bucket(source)
+
+    attempt = 0
+    while True:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"{source} deadline exceeded for {url}")
+        # Every attempt, retries included, takes a slot from the source's rate limit
+        if bucket is not None and not bucket.acquire(remaining):
+            raise RateLimitedError(f"{source} rate limit reached before the deadline")
+        kwargs['timeout'] = (min(connect_timeout, remaining), min(read_timeout, remaining))
+        try:
+            response = session.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            error = None
+        except requests.ReadTimeout:
+            raise
+        except requests.ConnectionError as e:
+            response = None
+            error = e
+
+        backoff = policy['backoff_factor'] * (2 ** attempt)
+        if attempt >= policy['max_retries'] or time.monotonic() + backoff >= deadline_at:
+            if error is not None:
+                raise error
+            return response
+        if response is not None:
+            response.close()
+        attempt += 1
+        time.sleep(backoff)
+
+
+def http_get(source: str, url: str, **kwargs: Any) -> requests.Response:
+    return request(source, 'GET', url, **kwargs)
+
+
+def http_post(source: str, url: str, **kwargs: Any) -> requests.Response:
+    return request(source, 'POST', url, **kwargs)
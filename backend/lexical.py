@@ -0,0 +1,40 @@
+"""In-process BM25 scoring for ranking a small pool of candidates by query terms."""
+import re
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+# Function words that carry no signal in a search query
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when where which who why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords."""
+    return [token for token in TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """Okapi BM25 score of every document against the query.
+
+    Term statistics come from ``documents`` themselves, so a term that every
+    candidate shares counts for little and a rare exact match counts for a lot.
+    """
+    scores = np.zeros(len(documents), dtype=np.float32)
+    terms = set(tokenize(query))
+    if not terms or not documents:
+        return scores
+    counts = [Counter(tokenize(document)) for document in documents]
+    lengths = np.array([sum(count.values()) for count in counts], dtype=np.float32)
+    norms = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    for term in terms:
+        tf = np.array([count.get(term, 0) for count in counts], dtype=np.float32)
+        df = np.count_nonzero(tf)
+        if df == 0:
+            continue
+        idf = np.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        scores += idf * tf * (k1 + 1) / (tf + norms)
+    return scores
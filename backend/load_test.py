@@ -0,0 +1,174 @@
+"""Concurrent load driver for the search API.
+
+Replays a list of queries against a running server from several threads and
+reports latency percentiles, throughput, errors, the per-stage breakdown from
+the ``Server-Timing`` response header and how often each source ended in each
+status. Run it against the app backed by mock_upstreams.py for repeatable
+numbers:
+
+    python mock_upstreams.py --port 8099 &
+    UPSTREAM_BASE_URL=http://127.0.0.1:8099 YOUTUBE_API_KEY=mock python app.py &
+    python load_test.py --url http://127.0.0.1:5000 --concurrency 16 --requests 500
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+DEFAULT_QUERIES = [
+    "machine learning", "climate change", "roman empire", "quantum computing", "vaccines",
+    "james webb telescope", "python web frameworks", "financial crisis 2008", "world cup final",
+    "electric vehicles", "renewable energy", "black holes", "ancient egypt", "neural networks",
+    "cryptocurrency regulation", "mars exploration", "gene editing", "jazz history",
+    "sourdough bread", "marathon training",
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 and mean of a list of millisecond timings."""
+    values = sorted(values)
+    return {
+        "p50_ms": round(percentile(values, 0.50), 1) if values else None,
+        "p95_ms": round(percentile(values, 0.95), 1) if values else None,
+        "p99_ms": round(percentile(values, 0.99), 1) if values else None,
+        "mean_ms": round(sum(values) / len(values), 1) if values else None,
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """``name;dur=12.3, other;desc="x";dur=4`` into ``{name: 12.3, other: 4.0}``."""
+    timings = {}
+    for metric in header.split(","):
+        name = metric.split(";")[0].strip()
+        duration = re.search(r"dur=([\d.]+)", metric)
+        if name and duration:
+            timings[name] = float(duration.group(1))
+    return timings
+
+
+class LoadRun:
+    """Collects per-request measurements from the worker threads."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.statuses = Counter()
+        self.source_statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms: float, response: Optional[requests.Response], error: Optional[str]) -> None:
+        with self.lock:
+            if error is not None:
+                self.errors[error] += 1
+                return
+            self.latencies.append(latency_ms)
+            self.statuses[response.status_code] += 1
+            for stage, duration in parse_server_timing(response.headers.get("Server-Timing", "")).items():
+                self.stages[stage].append(duration)
+            if response.ok and response.headers.get("Content-Type", "").startswith("application/json"):
+                for source, status in response.json().get("source_status", {}).items():
+                    self.source_statuses[source][status] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        completed = len(self.latencies)
+        return {
+            "requests": completed + sum(self.errors.values()),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+            "latency": summarize(self.latencies),
+            "http_statuses": dict(self.statuses),
+            "errors": dict(self.errors),
+            "stages": {stage: summarize(values) for stage, values in sorted(self.stages.items())},
+            "source_statuses": {source: dict(counts) for source, counts in sorted(self.source_statuses.items())},
+        }
+
+
+def run(url: str, endpoint: str, queries: List[str], concurrency: int, total: int, timeout: float,
+        cache_bust: bool, params: Dict[str, str]) -> Dict[str, Any]:
+    """Send ``total`` requests with ``concurrency`` threads and return the report."""
+    sequence = itertools.count()
+    sequence_lock = threading.Lock()
+    local = threading.local()
+    load = LoadRun()
+
+    def worker() -> None:
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        while True:
+            with sequence_lock:
+                n = next(sequence)
+            if n >= total:
+                return
+            query = queries[n % len(queries)]
+            if cache_bust:
+                query = f"{query} {n}"
+            started = time.perf_counter()
+            try:
+                response = session.get(f"{url}{endpoint}", params=dict(params, query=query), timeout=timeout)
+                response.content  # include the body transfer in the latency
+                load.record((time.perf_counter() - started) * 1000, response, None)
+            except requests.RequestException as e:
+                load.record((time.perf_counter() - started) * 1000, None, type(e).__name__)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return load.report(time.perf_counter() - started)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report["latency"]
+    print(f"{report['requests']} requests in {report['elapsed_s']}s, {report['throughput_rps']} req/s")
+    print(f"latency  p50={latency['p50_ms']}ms  p95={latency['p95_ms']}ms  p99={latency['p99_ms']}ms  mean={latency['mean_ms']}ms")
+    print(f"http statuses {report['http_statuses']}  errors {report['errors']}")
+    if report["stages"]:
+        print("stages (Server-Timing):")
+        for stage, stats in report["stages"].items():
+            print(f"  {stage:<16} p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  p99={stats['p99_ms']}ms")
+    if report["source_statuses"]:
+        print("source statuses:")
+        for source, counts in report["source_statuses"].items():
+            print(f"  {source:<10} " + "  ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default="http://127.0.0.1:5000")
+    parser.add_argument('--endpoint', default="/search")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10, help="requests sent first and left out of the report")
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--queries', help="file with one query per line (default: a built-in list)")
+    parser.add_argument('--cache-bust', action='store_true', help="make every query unique so caches never hit")
+    parser.add_argument('--param', action='append', default=[], metavar="KEY=VALUE", help="extra query parameter, e.g. deep=1")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    extra = dict(param.split("=", 1) for param in args.param)
+    if args.warmup:
+        run(args.url, args.endpoint, queries, min(args.concurrency, args.warmup), args.warmup, args.timeout, False, extra)
+    report = run(args.url, args.endpoint, queries, args.concurrency, args.requests, args.timeout, args.cache_bust, extra)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,185 @@
+"""Persistent local corpus of previously retrieved results, searchable by embedding."""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Rows scored per matrix product, so one search only pages in a bounded slice at a time
+SEARCH_CHUNK_ROWS = 65536
+
+
+class LocalIndex:
+    """Append-only vector index over results the remote sources already returned.
+
+    Vectors live in a memory-mapped float32 matrix (``<path>.f32``) and each
+    row's result is one JSON line in ``<path>.jsonl``, where line ``i``
+    describes row ``i``. Rows are flushed before their metadata is appended,
+    as in the embedding cache, and a URL is only stored once. Once the index
+    holds ``capacity`` rows it stops admitting new results. Vectors are kept
+    in float32 so searches multiply the mapped pages directly; converting
+    float16 rows on every search costs far more than the scan itself.
+
+    Only the process holding the lock on ``<path>.lock`` appends. Other
+    processes open the index read-only and pick up rows the writer has added
+    since their last search.
+    """
+
+    def __init__(self, dim: int, path: str, capacity: int = 100000):
+        self.dim = dim
+        self.capacity = capacity
+        self.writable = False
+        self.searches = 0
+        self.added = 0
+        self._lock = threading.Lock()
+        self._rows: List[Dict[str, Any]] = []
+        self._urls = set()
+        self._matrix = None
+        self._meta_file = None
+        self._meta_offset = 0
+        self._lock_file = None
+        self._meta_path = f"{path}.jsonl"
+        self._open(path)
+
+    def _open(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        matrix_path = f"{path}.f32"
+        expected_size = self.capacity * self.dim * np.dtype(np.float32).itemsize
+
+        if fcntl is not None:
+            self._lock_file = open(f"{path}.lock", "a")
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.writable = True
+            except OSError:
+                print(f"Local index at {path} is owned by another process, opening it read-only")
+        else:
+            print("Local index needs fcntl file locking, opening it read-only")
+
+        if os.path.exists(matrix_path) and os.path.getsize(matrix_path) != expected_size:
+            if not self.writable:
+                print(f"Local index at {path} does not match current settings, disabling it")
+                return
+            # Dimension or capacity changed since the files were written; start over
+            print(f"Local index at {path} does not match current settings, resetting")
+            os.remove(matrix_path)
+            if os.path.exists(self._meta_path):
+                os.remove(self._meta_path)
+
+        if not os.path.exists(matrix_path) and not self.writable:
+            return
+        mode = "r+" if os.path.exists(matrix_path) else "w+"
+        if not self.writable:
+            mode = "r"
+        self._matrix = np.memmap(matrix_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+
+        self._load_new_rows()
+        if self.writable:
+            # Drop a torn last line before appending after it
+            with open(self._meta_path, "a") as f:
+                f.truncate(self._meta_offset)
+            self._meta_file = open(self._meta_path, "a")
+        print(f"Local index loaded {len(self._rows)} documents from {path}")
+
+    def _load_new_rows(self) -> None:
+        """Read metadata lines appended since the last load."""
+        if not os.path.exists(self._meta_path) or os.path.getsize(self._meta_path) <= self._meta_offset:
+            return
+        with open(self._meta_path, "r") as f:
+            f.seek(self._meta_offset)
+            for line in f:
+                if len(self._rows) >= self.capacity or not line.endswith("\n"):
+                    # A torn last line means the write was interrupted (or is in progress)
+                    break
+                row = json.loads(line)
+                self._rows.append(row)
+                self._urls.add(row["url"])
+                self._meta_offset += len(line.encode())
+
+    def add(self, results: List[Dict[str, Any]], embeddings: np.ndarray) -> int:
+        """Store results not seen before with their normalized embeddings; return how many were added."""
+        if not self.writable or self._matrix is None:
+            return 0
+        with self._lock:
+            lines = []
+            now = int(time.time())
+            for result, vector in zip(results, embeddings):
+                url = result.get("url")
+                if not url or url in self._urls or len(self._rows) >= self.capacity:
+                    continue
+                row = {key: value for key, value in result.items() if key not in ("relevance", "_text")}
+                row["indexed_at"] = now
+                self._matrix[len(self._rows)] = np.asarray(vector, dtype=np.float32)
+                self._rows.append(row)
+                self._urls.add(url)
+                lines.append(json.dumps(row) + "\n")
+            if lines:
+                # Rows must be on disk before the metadata points at them
+                self._matrix.flush()
+                data = "".join(lines)
+                self._meta_file.write(data)
+                self._meta_file.flush()
+                self._meta_offset += len(data.encode())
+                self.added += len(lines)
+            return len(lines)
+
+    def search(self, query_embedding: np.ndarray, k: int = 5, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Return copies of the k stored results most similar to the query, best first, with ``relevance``."""
+        if self._matrix is None:
+            return []
+        with self._lock:
+            if not self.writable:
+                self._load_new_rows()
+            size = len(self._rows)
+            self.searches += 1
+            if size == 0 or k <= 0:
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32)
+            scores = np.empty(size, dtype=np.float32)
+            for start in range(0, size, SEARCH_CHUNK_ROWS):
+                stop = min(start + SEARCH_CHUNK_ROWS, size)
+                scores[start:stop] = self._matrix[start:stop] @ query
+            top = np.argpartition(-scores, k - 1)[:k] if k < size else np.arange(size)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            hits = []
+            for row in top:
+                if scores[row] < min_score:
+                    break
+                hit = dict(self._rows[row])
+                hit["relevance"] = float(scores[row])
+                hits.append(hit)
+            return hits
+
+    def close(self) -> None:
+        """Flush and release the index so another process can take it over."""
+        with self._lock:
+            if self.writable:
+                self._matrix.flush()
+            if self._meta_file is not None:
+                self._meta_file.close()
+            if self._lock_file is not None:
+                self._lock_file.close()
+            self._matrix = None
+            self._meta_file = None
+            self._lock_file = None
+            self.writable = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return corpus size and counters."""
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "capacity": self.capacity,
+                "added": self.added,
+                "searches": self.searches,
+                "writable": self.writable,
+            }
@@ -0,0 +1,278 @@
+"""Local stand-in for every upstream the search sources call, for offline benchmarks.
+
+One HTTP server answers the Wikipedia, arXiv, NewsAPI, Reddit, YouTube (API and
+results page), DuckDuckGo and Qwant endpoints on their real paths, so pointing
+the app at it only takes ``UPSTREAM_BASE_URL``:
+
+    python mock_upstreams.py --port 8099 --latency-ms 150 --jitter-ms 50
+    UPSTREAM_BASE_URL=http://127.0.0.1:8099 YOUTUBE_API_KEY=mock python app.py
+
+Responses are replayed from ``--fixtures`` (``<upstream>/<query hash>.json``).
+Queries without a recording get a synthetic response in the upstream's real
+format, built deterministically from the query. ``--record`` fills the
+fixtures directory by proxying to the real services instead.
+
+Latency and failures are injected per upstream: a normal delay of
+``latency_ms`` plus or minus ``jitter_ms``, a ``failure_rate`` share of 503s
+and a ``hang_rate`` share of responses held for ``hang_ms``. Set them on the
+command line (``--set news.failure_rate=0.2``) or while running with
+``POST /_mock/config`` and a body like ``{"news": {"hang_rate": 0.5}}``
+(``"*"`` applies to every upstream).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+
+# name: (path, real origin, query parameter)
+UPSTREAMS = {
+    'wikipedia': ('/w/api.php', 'https://en.wikipedia.org', 'srsearch'),
+    'arxiv': ('/api/query', 'http://export.arxiv.org', 'search_query'),
+    'news': ('/v2/everything', 'https://newsapi.org', 'q'),
+    'reddit': ('/search.json', 'https://www.reddit.com', 'q'),
+    'youtube-api': ('/youtube/v3/search', 'https://www.googleapis.com', 'q'),
+    'youtube': ('/results', 'https://www.youtube.com', 'search_query'),
+    'web': ('/html/', 'https://html.duckduckgo.com', 'q'),
+    'qwant': ('/v3/search/web', 'https://api.qwant.com', 'q'),
+    'pages': ('/page/', None, None),
+}
+DEFAULT_BEHAVIOUR = {'latency_ms': 100.0, 'jitter_ms': 30.0, 'failure_rate': 0.0, 'hang_rate': 0.0, 'hang_ms': 10000.0}
+RESULTS_PER_QUERY = 10
+
+TOPIC_WORDS = [
+    "history", "research", "overview", "analysis", "guide", "introduction", "review", "latest",
+    "explained", "applications", "theory", "practice", "debate", "future", "case study", "survey",
+]
+
+
+def upstream_for(path: str) -> Optional[str]:
+    for name, (upstream_path, _, _) in UPSTREAMS.items():
+        if path == upstream_path or (upstream_path.endswith('/') and path.startswith(upstream_path)):
+            return name
+    return None
+
+
+def fixture_path(fixtures: str, upstream: str, query: str) -> str:
+    digest = hashlib.sha1(" ".join(query.lower().split()).encode()).hexdigest()[:16]
+    return os.path.join(fixtures, upstream, f"{digest}.json")
+
+
+def synthetic_items(query: str, upstream: str):
+    """Deterministic (title, text, slug) triples about the query, one of them a near-duplicate."""
+    rng = random.Random(f"{upstream}:{query}")
+    items = []
+    for i in range(RESULTS_PER_QUERY):
+        words = rng.sample(TOPIC_WORDS, 3)
+        title = f"{query.title()} {words[0]} {i + 1}" if i % 4 else f"{query.title()}: {words[0]} and {words[1]}"
+        text = (f"This {words[1]} covers {query} in depth, including its {words[2]} and {words[0]}. "
+                f"Readers interested in {query} will find {rng.randint(3, 12)} sections on related topics.")
+        items.append((title, text, f"{urllib.parse.quote(query.replace(' ', '-'))}-{upstream}-{i}"))
+    # The same story twice with a slightly different title, as syndicated news and reposts do
+    items[-1] = (items[0][0] + " (updated)", items[0][1], items[-1][2])
+    return items
+
+
+def synthetic_response(upstream: str, query: str, params: Dict[str, str], base: str) -> Tuple[int, str, str]:
+    """``(status, content type, body)`` in the upstream's real response format."""
+    items = synthetic_items(query, upstream)
+    if upstream == 'wikipedia':
+        if 'pageids' in params:
+            pages = [{"pageid": int(page_id), "extract": f"Extract for page {page_id}."}
+                     for page_id in params['pageids'].split('|')]
+            return 200, "application/json", json.dumps({"query": {"pages": pages}})
+        search = [{"pageid": 1000 + i, "title": title, "snippet": f"<span class=\"searchmatch\">{query}</span> {text[:120]}"}
+                  for i, (title, text, _) in enumerate(items)]
+        pages = [{"pageid": 1000 + i, "title": title, "extract": text} for i, (title, text, _) in enumerate(items)]
+        return 200, "application/json", json.dumps({"query": {"search": search, "pages": pages}})
+    if upstream == 'arxiv':
+        entries = "".join(
+            f"<entry><id>http://arxiv.org/abs/2401.{10000 + i}v1</id><title>{title}</title>"
+            f"<summary>{text}</summary></entry>" for i, (title, text, _) in enumerate(items))
+        return 200, "application/atom+xml", f"<?xml version=\"1.0\"?><feed>{entries}</feed>"
+    if upstream == 'news':
+        articles = [{"title": title, "url": f"{base}/page/{slug}", "description": text,
+                     "source": {"name": "Mock News"}, "publishedAt": "2024-01-01T00:00:00Z", "author": "Mock Author"}
+                    for title, text, slug in items]
+        return 200, "application/json", json.dumps({"status": "ok", "articles": articles})
+    if upstream == 'reddit':
+        children = [{"data": {"title": title, "permalink": f"/r/mock/comments/{slug}/", "selftext": text}}
+                    for title, text, slug in items]
+        return 200, "application/json", json.dumps({"data": {"children": children}})
+    if upstream == 'youtube-api':
+        videos = [{"id": {"videoId": f"vid{i:08d}"}, "snippet": {"title": title, "description": text}}
+                  for i, (title, text, _) in enumerate(items)]
+        return 200, "application/json", json.dumps({"items": videos})
+    if upstream == 'youtube':
+        videos = [{"videoRenderer": {"videoId": f"vid{i:08d}", "title": {"runs": [{"text": title}]},
+                                     "descriptionSnippet": {"runs": [{"text": text}]}}}
+                  for i, (title, text, _) in enumerate(items)]
+        data = {"contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {"sectionListRenderer": {
+            "contents": [{"itemSectionRenderer": {"contents": videos}}]}}}}}
+        return 200, "text/html", f"<html><script>var ytInitialData = {json.dumps(data)};</script></html>"
+    if upstream == 'web':
+        results = "".join(
+            f"<div class=\"result\"><a class=\"result__a\" href=\"{base}/page/{slug}\">{title}</a>"
+            f"<a class=\"result__snippet\">{text}</a></div>" for title, text, slug in items)
+        return 200, "text/html", f"<html><body>{results}</body></html>"
+    if upstream == 'qwant':
+        qwant_items = [{"title": title, "url": f"{base}/page/{slug}", "description": text} for title, text, slug in items]
+        return 200, "application/json", json.dumps({"data": {"result": {"items": qwant_items}}})
+    # pages: an article body for the deep content stage
+    slug = query
+    paragraphs = "".join(f"<p>{slug.replace('-', ' ')} {word} paragraph {i}.</p>" for i, word in enumerate(TOPIC_WORDS))
+    return 200, "text/html", f"<html><body><nav>Menu</nav><article><h1>{slug}</h1>{paragraphs}</article></body></html>"
+
+
+class MockState:
+    """Shared behaviour settings and counters for the running server."""
+
+    def __init__(self, fixtures: str, record: bool, behaviour: Dict[str, Dict[str, float]]):
+        self.fixtures = fixtures
+        self.record = record
+        self.behaviour = behaviour
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def settings(self, upstream: str) -> Dict[str, float]:
+        settings = dict(DEFAULT_BEHAVIOUR)
+        settings.update(self.behaviour.get('*', {}))
+        settings.update(self.behaviour.get(upstream, {}))
+        return settings
+
+    def count(self, upstream: str, outcome: str) -> None:
+        with self.lock:
+            upstream_counts = self.counts.setdefault(upstream, {})
+            upstream_counts[outcome] = upstream_counts.get(outcome, 0) + 1
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    state: MockState = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        parsed = urllib.parse.urlparse(self.path)
+        params = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.command == "POST" and self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+            params.update({key: values[0] for key, values in urllib.parse.parse_qs(body.decode()).items()})
+
+        if parsed.path == "/_mock/config":
+            if self.command == "POST":
+                for upstream, settings in json.loads(body or b"{}").items():
+                    self.state.behaviour.setdefault(upstream, {}).update(settings)
+            return self._send(200, "application/json", json.dumps({"behaviour": self.state.behaviour, "counts": self.state.counts}))
+
+        upstream = upstream_for(parsed.path)
+        if upstream is None:
+            return self._send(404, "text/plain", "unknown upstream")
+        settings = self.state.settings(upstream)
+        roll = random.random()
+        if roll < settings['hang_rate']:
+            self.state.count(upstream, "hang")
+            time.sleep(settings['hang_ms'] / 1000)
+        elif roll < settings['hang_rate'] + settings['failure_rate']:
+            self.state.count(upstream, "failure")
+            time.sleep(max(random.gauss(settings['latency_ms'], settings['jitter_ms']), 0) / 1000)
+            return self._send(503, "text/plain", "injected failure")
+        else:
+            time.sleep(max(random.gauss(settings['latency_ms'], settings['jitter_ms']), 0) / 1000)
+
+        if upstream == 'pages':
+            query = parsed.path[len(UPSTREAMS['pages'][0]):]
+        else:
+            query = params.get(UPSTREAMS[upstream][2], "")
+            if upstream == 'arxiv' and query.startswith("all:"):
+                query = query[4:]
+        status, content_type, payload = self._respond(upstream, query, params, parsed, body)
+        self.state.count(upstream, str(status))
+        self._send(status, content_type, payload)
+
+    def _respond(self, upstream: str, query: str, params: Dict[str, str], parsed, body: bytes) -> Tuple[int, str, str]:
+        base = f"http://{self.headers.get('Host')}"
+        path = fixture_path(self.state.fixtures, upstream, query) if query and upstream != 'pages' else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                fixture = json.load(f)
+            return fixture["status"], fixture["content_type"], fixture["body"]
+        if path and self.state.record and UPSTREAMS[upstream][1]:
+            return self._record(upstream, path, parsed, body)
+        return synthetic_response(upstream, query, params, base)
+
+    def _record(self, upstream: str, path: str, parsed, body: bytes) -> Tuple[int, str, str]:
+        url = UPSTREAMS[upstream][1] + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        headers = {key: value for key, value in self.headers.items() if key.lower() in ("user-agent", "accept", "accept-language", "content-type")}
+        response = requests.request(self.command, url, data=body or None, headers=headers, timeout=10)
+        fixture = {"status": response.status_code, "content_type": response.headers.get("Content-Type", "text/plain"),
+                   "body": response.text}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(fixture, f)
+        return fixture["status"], fixture["content_type"], fixture["body"]
+
+    def _send(self, status: int, content_type: str, payload: str) -> None:
+        data = payload.encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            pass  # the client gave up, e.g. its deadline passed during an injected hang
+
+    def log_message(self, *args):
+        pass
+
+
+def parse_overrides(overrides) -> Dict[str, Dict[str, float]]:
+    """``upstream.field=value`` pairs into a behaviour mapping."""
+    behaviour: Dict[str, Dict[str, Any]] = {}
+    for override in overrides or []:
+        key, _, value = override.partition("=")
+        upstream, _, field = key.partition(".")
+        if field not in DEFAULT_BEHAVIOUR:
+            raise ValueError(f"Unknown setting '{field}', expected one of {', '.join(DEFAULT_BEHAVIOUR)}")
+        behaviour.setdefault(upstream, {})[field] = float(value)
+    return behaviour
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8099, fixtures: str = "bench_fixtures", record: bool = False,
+                behaviour: Optional[Dict[str, Dict[str, float]]] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a mock upstream server."""
+    handler = type("Handler", (MockHandler,), {"state": MockState(fixtures, record, behaviour or {})})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fixtures', default="bench_fixtures", help="directory of recorded responses")
+    parser.add_argument('--record', action='store_true', help="proxy unrecorded queries to the real upstreams and save them")
+    for field, value in DEFAULT_BEHAVIOUR.items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=float, default=value, help=f"default {field} for every upstream")
+    parser.add_argument('--set', action='append', metavar="UPSTREAM.FIELD=VALUE", help="per-upstream override, repeatable")
+    args = parser.parse_args()
+
+    behaviour = {'*': {field: getattr(args, field) for field in DEFAULT_BEHAVIOUR}}
+    for upstream, settings in parse_overrides(args.set).items():
+        behaviour.setdefault(upstream, {}).update(settings)
+    server = make_server(args.host, args.port, args.fixtures, args.record, behaviour)
+    print(f"Mock upstreams on http://{args.host}:{args.port} ({', '.join(name for name in UPSTREAMS)})")
+    server.serve_forever()
@@ -0,0 +1,123 @@
+"""Concurrent, size-capped page fetching and main-text extraction for result URLs."""
+import concurrent.futures
+import re
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from http_pool import deadline_scope, http_get, remaining_time
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+CHUNK_SIZE = 16384
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9",
+}
+# Elements that never hold the article text
+SKIP_TAGS = ("script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form")
+MAIN_SELECTORS = "main, article, #content, .content, .main, #main, .post, #post"
+
+
+def read_capped(url: str, max_bytes: int) -> Optional[Tuple[str, str]]:
+    """Stream a page's first ``max_bytes`` as ``(content_type, text)``; None for errors and non-text types."""
+    response = http_get('pages', url, headers=HEADERS, stream=True)
+    try:
+        content_type, _, params = response.headers.get("Content-Type", "text/html").partition(";")
+        content_type = content_type.strip().lower()
+        if response.status_code != 200 or content_type not in TEXT_TYPES:
+            return None
+        charset = re.search(r"charset=([\w-]+)", params, re.I)
+        body = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            body.extend(chunk)
+            remaining = remaining_time()
+            if len(body) >= max_bytes or (remaining is not None and remaining <= 0):
+                break
+        try:
+            text = bytes(body[:max_bytes]).decode(charset.group(1) if charset else "utf-8", errors="replace")
+        except LookupError:  # unknown charset name
+            text = bytes(body[:max_bytes]).decode("utf-8", errors="replace")
+        return content_type, text
+    finally:
+        response.close()
+
+
+def extract_text(html: str, max_chars: int = 10000) -> str:
+    """Main readable text of an HTML document, whitespace-collapsed and truncated."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for tag in soup(SKIP_TAGS):
+        tag.decompose()
+    main_elements = soup.select(MAIN_SELECTORS)
+    if main_elements:
+        content = " ".join(element.get_text(separator=" ", strip=True) for element in main_elements)
+    else:
+        root = soup.body or soup
+        content = root.get_text(separator=" ", strip=True)
+    return re.sub(r"\s+", " ", content).strip()[:max_chars]
+
+
+class PageFetcher:
+    """Fetches many pages at once under a shared budget and a per-host concurrency limit.
+
+    Each page is streamed and cut off at ``max_bytes``, so a huge or slow page
+    costs bounded memory and time. Worker threads share the ``pages`` HTTP
+    pool; a page that is still downloading when the budget runs out is left
+    out of the result and its thread stops at the same deadline.
+    """
+
+    def __init__(self, max_workers: int = 16, per_host_limit: int = 2, max_bytes: int = 512 * 1024,
+                 max_chars: int = 10000):
+        self.per_host_limit = per_host_limit
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pages")
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urllib.parse.urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def fetch(self, url: str, deadline_at: float) -> str:
+        """Fetch and extract one page, giving up at ``deadline_at`` (a monotonic time)."""
+        slot = self._slot(url)
+        if not slot.acquire(timeout=max(deadline_at - time.monotonic(), 0)):
+            return ""
+        try:
+            with deadline_scope(deadline_at - time.monotonic()):
+                page = read_capped(url, self.max_bytes)
+            if page is None:
+                return ""
+            content_type, text = page
+            if content_type == "text/plain":
+                return re.sub(r"\s+", " ", text).strip()[:self.max_chars]
+            return extract_text(text, self.max_chars)
+        except Exception as e:
+            print(f"Error fetching content from {url}: {e}")
+            return ""
+        finally:
+            slot.release()
+
+    def fetch_many(self, urls: List[str], budget: float) -> Dict[str, str]:
+        """Fetch pages concurrently and return the non-empty texts that finished within ``budget`` seconds."""
+        deadline_at = time.monotonic() + budget
+        futures = {self._executor.submit(self.fetch, url, deadline_at): url for url in dict.fromkeys(urls)}
+        done, _ = concurrent.futures.wait(futures, timeout=max(budget, 0))
+        pages = {}
+        for future in done:
+            text = future.result()
+            if text:
+                pages[futures[future]] = text
+        return pages
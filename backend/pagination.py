@@ -0,0 +1,67 @@
+"""Cursor pagination over ranked per-source results kept in expiring search sessions."""
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+
+from fanout import OK
+from result_cache import MISS, ResultCache
+
+
+def parse_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """``(session_id, page)`` from a ``"<session_id>.<page>"`` cursor, or None when it is malformed."""
+    session_id, _, page = (cursor or "").rpartition(".")
+    if not session_id or not page.isdigit():
+        return None
+    return session_id, int(page)
+
+
+def is_partial(statuses: Dict[str, str]) -> bool:
+    """Whether any source is missing from a response, i.e. neither fetched nor cached."""
+    return any(status not in (OK, "cached") for status in statuses.values())
+
+
+class SearchSessions:
+    """Ranked result sets kept for ``ttl`` seconds so later pages skip the search.
+
+    Pages hold ``page_size`` results per source. A search whose results fit on
+    one page opens no session, and its payload has no ``next_cursor``.
+    """
+
+    def __init__(self, page_size: int = 3, ttl: float = 600, max_items: int = 2000):
+        self.page_size = page_size
+        self.ttl = ttl
+        self._sessions = ResultCache(max_items=max_items, stale_ttl=0)
+
+    def open(self, query: str, ranked: Dict[str, List[Dict[str, Any]]], source_status: Dict[str, str], degraded: bool) -> Optional[str]:
+        """Store a ranked set that spans more than one page and return its session id."""
+        if not any(len(source_results) > self.page_size for source_results in ranked.values()):
+            return None
+        session_id = secrets.token_urlsafe(12)
+        self._sessions.set(session_id, {"query": query, "results": ranked, "source_status": source_status, "degraded": degraded}, self.ttl)
+        return session_id
+
+    def page_payload(self, query: str, ranked: Dict[str, List[Dict[str, Any]]], page: int, session_id: str = None) -> Dict[str, Any]:
+        """One page of per-source ranked results, with the cursor of the next page if there is one."""
+        start = page * self.page_size
+        response_data = {"query": query}
+        response_data.update({source: source_results[start:start + self.page_size] for source, source_results in ranked.items()})
+        more = any(len(source_results) > start + self.page_size for source_results in ranked.values())
+        response_data["next_cursor"] = f"{session_id}.{page + 1}" if session_id and more else None
+        return response_data
+
+    def session_page(self, cursor: str) -> Optional[Dict[str, Any]]:
+        """The page a cursor points at, or None when the cursor is malformed or its session expired."""
+        parsed = parse_cursor(cursor)
+        if parsed is None:
+            return None
+        session_id, page = parsed
+        session, state = self._sessions.get(session_id)
+        if state == MISS:
+            return None
+        response_data = self.page_payload(session["query"], session["results"], page, session_id)
+        response_data["source_status"] = session["source_status"]
+        response_data["partial"] = is_partial(session["source_status"])
+        response_data["degraded"] = session["degraded"]
+        return response_data
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
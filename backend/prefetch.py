@@ -0,0 +1,140 @@
+"""Background prefetching that keeps the most popular queries' cached results warm."""
+import heapq
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class DecayingCounter:
+    """Frequency counter whose counts halve every ``half_life`` seconds.
+
+    Recent popularity outweighs old popularity, so yesterday's trend fades
+    out on its own. At most ``max_items`` keys are tracked; the weakest are
+    dropped first.
+    """
+
+    def __init__(self, half_life: float = 3600, max_items: int = 10000):
+        self.half_life = half_life
+        self.max_items = max_items
+        # Counts are stored scaled to the epoch so adding never rescales every key
+        self._epoch = time.monotonic()
+        self._scores: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def _scale(self, now: float) -> float:
+        return math.pow(2.0, (now - self._epoch) / self.half_life)
+
+    def add(self, key: Hashable, amount: float = 1.0) -> None:
+        now = time.monotonic()
+        with self._lock:
+            scale = self._scale(now)
+            if scale > 1e6:
+                # Rebase before the scaled values lose precision
+                self._scores = {k: v / scale for k, v in self._scores.items()}
+                self._epoch, scale = now, 1.0
+            self._scores[key] = self._scores.get(key, 0.0) + amount * scale
+            if len(self._scores) > self.max_items:
+                for weakest, _ in heapq.nsmallest(len(self._scores) - self.max_items, self._scores.items(), key=lambda item: item[1]):
+                    del self._scores[weakest]
+
+    def count(self, key: Hashable) -> float:
+        with self._lock:
+            return self._scores.get(key, 0.0) / self._scale(time.monotonic())
+
+    def top(self, n: int, min_count: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """The ``n`` keys with the highest decayed counts of at least ``min_count``, highest first."""
+        with self._lock:
+            scale = self._scale(time.monotonic())
+            best = heapq.nlargest(n, self._scores.items(), key=lambda item: item[1])
+        return [(key, score / scale) for key, score in best if score / scale >= min_count]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class Prefetcher:
+    """Refreshes the cached results of the most frequent queries before they expire.
+
+    Every ``interval`` seconds the ``top_n`` queries seen at least
+    ``min_count`` times (decayed) are checked, most popular first.
+    ``due(query)`` names the sources whose entries are missing or expire
+    within the lead time, and ``refresh(query, sources)`` fetches them. A
+    cycle spends at most ``budget`` source calls, a source is not refreshed
+    for the same query twice within ``min_gap`` seconds, and ``paused()``
+    can hold the whole cycle back, e.g. while the server is under load.
+    """
+
+    def __init__(self, due: Callable[[str], List[str]], refresh: Callable[[str, List[str]], Any],
+                 paused: Callable[[], bool] = lambda: False, top_n: int = 50, min_count: float = 2.0,
+                 interval: float = 60, budget: int = 30, min_gap: float = 300, half_life: float = 3600):
+        self.due = due
+        self.refresh = refresh
+        self.paused = paused
+        self.top_n = top_n
+        self.min_count = min_count
+        self.interval = interval
+        self.budget = budget
+        self.min_gap = min_gap
+        self.counter = DecayingCounter(half_life=half_life)
+        self._last_refresh: Dict[Tuple[str, str], float] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.errors = 0
+
+    def record(self, query: str) -> None:
+        """Count one search for a (normalized) query."""
+        self.counter.add(query)
+
+    def run_once(self) -> int:
+        """Run one prefetch cycle and return the number of source calls it spent."""
+        if self.paused():
+            return 0
+        now = time.monotonic()
+        # Forget refresh times that can no longer block anything
+        self._last_refresh = {key: at for key, at in self._last_refresh.items() if now - at < self.min_gap}
+        spent = 0
+        for query, _ in self.counter.top(self.top_n, self.min_count):
+            if spent >= self.budget:
+                break
+            sources = [source for source in self.due(query) if (query, source) not in self._last_refresh]
+            sources = sources[:self.budget - spent]
+            if not sources:
+                continue
+            for source in sources:
+                self._last_refresh[(query, source)] = now
+            spent += len(sources)
+            try:
+                self.refresh(query, sources)
+                self.refreshed += len(sources)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error prefetching '{query}': {e}")
+        self.cycles += 1
+        return spent
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Prefetch cycle failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_queries": len(self.counter),
+            "top": [(query, round(count, 2)) for query, count in self.counter.top(5)],
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "errors": self.errors,
+        }
@@ -0,0 +1,92 @@
+"""Bounded LRU cache with per-entry TTLs and stale-while-revalidate support."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class ResultCache:
+    """LRU cache whose entries expire after their own TTL.
+
+    An expired entry is still served as ``STALE`` for ``stale_ttl`` more
+    seconds so the caller can answer immediately and refresh it in the
+    background. ``start_refresh``/``end_refresh`` make sure only one refresh
+    per key is in flight.
+    """
+
+    def __init__(self, max_items: int = 5000, stale_ttl: float = 3600):
+        self.max_items = max_items
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Return ``(value, state)`` where state is FRESH, STALE or MISS."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, MISS
+            value, expires_at = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None, MISS
+            self._entries.move_to_end(key)
+            if now < expires_at:
+                self.hits += 1
+                return value, FRESH
+            self.stale_hits += 1
+            return value, STALE
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until key expires (negative once stale), or None if it is not cached.
+
+        A peek: it neither counts as a hit nor refreshes the entry's LRU position.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            remaining = entry[1] - time.monotonic()
+            return remaining if remaining > -self.stale_ttl else None
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def start_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh for key; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "items": len(self._entries),
+                "refreshing": len(self._refreshing),
+            }
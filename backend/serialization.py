@@ -0,0 +1,78 @@
+"""Compact response encoding: field projection, fast JSON and negotiated compression."""
+import gzip
+import json
+from typing import Any, Collection, Dict, FrozenSet, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings we can produce, best first
+ENCODINGS = (("br",) if brotli is not None else ()) + ("gzip",)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def parse_fields(value: Any) -> Optional[FrozenSet[str]]:
+    """A ``fields`` parameter (comma-separated string or list) as a set, or None for all fields."""
+    if not value:
+        return None
+    names = value.split(",") if isinstance(value, str) else value
+    return frozenset(name.strip() for name in names if isinstance(name, str) and name.strip()) or None
+
+
+def shape_results(results: List[Dict[str, Any]], fields: Optional[Collection[str]], decimals: int) -> List[Dict[str, Any]]:
+    """Copies of results cut down to ``fields``, with relevance rounded to ``decimals``."""
+    shaped = []
+    for result in results:
+        result = {key: value for key, value in result.items() if fields is None or key in fields}
+        if isinstance(result.get("relevance"), float):
+            result["relevance"] = round(result["relevance"], decimals)
+        shaped.append(result)
+    return shaped
+
+
+def shape_payload(payload: Dict[str, Any], sources: Collection[str], fields: Optional[Collection[str]], decimals: int) -> Dict[str, Any]:
+    """Copy of a search payload with every source's results shaped; the input is left untouched."""
+    shaped = dict(payload)
+    for source in sources:
+        if isinstance(shaped.get(source), list):
+            shaped[source] = shape_results(shaped[source], fields, decimals)
+    return shaped
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The supported content coding the ``Accept-Encoding`` header rates highest.
+
+    Ties go to the coding listed first in ENCODINGS; codings rated q=0 are never chosen.
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+    qualities = {encoding: accepted.get(encoding, accepted.get("*", 0)) for encoding in ENCODINGS}
+    best = max(ENCODINGS, key=lambda encoding: qualities[encoding])
+    return best if qualities[best] > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
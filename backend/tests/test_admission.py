@@ -0,0 +1,47 @@
+import threading
+import time
+
+from admission import AdmissionController
+
+
+def test_admits_up_to_capacity_then_queues_and_rejects():
+    controller = AdmissionController(max_active=2, max_queued=1, queue_timeout=0.1, degrade_at=1.0)
+    assert controller.acquire() and controller.acquire()
+    assert controller.under_pressure()
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(controller.acquire()))
+    waiter.start()
+    while controller.stats()["queued"] < 1:
+        time.sleep(0.005)
+    # The queue is full, so the next one is refused without waiting
+    started = time.monotonic()
+    assert not controller.acquire()
+    assert time.monotonic() - started < 0.05
+    waiter.join()
+    assert results == [False]
+    assert controller.stats()["rejected"] == 1 and controller.stats()["timed_out"] == 1
+
+
+def test_queued_request_gets_a_released_slot():
+    controller = AdmissionController(max_active=1, max_queued=1, queue_timeout=1.0)
+    assert controller.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(controller.acquire()))
+    waiter.start()
+    while controller.stats()["queued"] < 1:
+        time.sleep(0.005)
+    controller.release()
+    waiter.join()
+    assert results == [True]
+    assert controller.stats()["active"] == 1
+
+
+def test_pressure_starts_at_the_degrade_threshold():
+    controller = AdmissionController(max_active=4, degrade_at=0.5)
+    controller.acquire()
+    assert not controller.under_pressure()
+    controller.acquire()
+    assert controller.under_pressure()
+    controller.release()
+    assert not controller.under_pressure()
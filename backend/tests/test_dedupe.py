@@ -0,0 +1,51 @@
+import numpy as np
+
+from dedupe import dedupe_indices, result_domain
+
+
+def normalized(rows):
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def test_result_domain_unwraps_duckduckgo_redirects():
+    url = "https://duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.example.com%2Fpage&rut=abc"
+    assert result_domain(url) == "example.com"
+    # Protocol-relative redirect links once got the DuckDuckGo host prefixed twice
+    assert result_domain("https://duckduckgo.com//duckduckgo.com/l/?uddg=https%3A%2F%2Fnews.example.org%2Fa") == "news.example.org"
+    assert result_domain("https://WWW.Example.com/a") == "example.com"
+    assert result_domain("https://en.wikipedia.org/wiki/Python") == "en.wikipedia.org"
+
+
+def test_drops_semantic_near_duplicates_keeping_the_first():
+    embeddings = normalized([[1, 0, 0], [0.99, 0.05, 0], [0, 1, 0]])
+    kept = dedupe_indices(["a", "b", "c"], ["x.com", "y.com", "z.com"], embeddings, threshold=0.95)
+    assert kept == [0, 2]
+
+
+def test_drops_exact_content_repeats():
+    embeddings = normalized([[1, 0], [0, 1]])
+    assert dedupe_indices(["same", "same"], ["x.com", "y.com"], embeddings) == [0]
+
+
+def test_caps_results_per_domain():
+    embeddings = np.eye(4, dtype=np.float32)
+    kept = dedupe_indices(list("abcd"), ["x.com"] * 3 + ["y.com"], embeddings, max_per_domain=2)
+    assert kept == [0, 1, 3]
+
+
+def test_results_without_a_domain_are_not_capped():
+    embeddings = np.eye(4, dtype=np.float32)
+    kept = dedupe_indices(list("abcd"), [None, None, None, "x.com"], embeddings, max_per_domain=1)
+    assert kept == [0, 1, 2, 3]
+
+
+def test_near_duplicate_of_a_dropped_result_is_kept():
+    # b is dropped by the domain cap, so c (similar only to b) must survive
+    embeddings = normalized([[1, 0, 0], [0, 1, 0], [0, 0.99, 0.1]])
+    kept = dedupe_indices(list("abc"), ["x.com", "x.com", "y.com"], embeddings, threshold=0.95, max_per_domain=1)
+    assert kept == [0, 2]
+
+
+def test_empty_input():
+    assert dedupe_indices([], [], np.empty((0, 3), dtype=np.float32)) == []
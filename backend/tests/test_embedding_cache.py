@@ -0,0 +1,102 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def vectors(n, dim=4):
+    return np.eye(n, dim, dtype=np.float32)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(dim=4, max_items=2)
+    cache.put_many(["a", "b"], vectors(2))
+    cache.get_many(["a"])  # "a" is now more recent than "b"
+    cache.put_many(["c"], vectors(1))
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert a is not None and c is not None
+    assert b is None
+
+
+def test_counts_hits_and_misses():
+    cache = EmbeddingCache(dim=4)
+    cache.put_many(["a"], vectors(1))
+    cache.get_many(["a", "missing"])
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(dim=4, max_items=1, disk_path=path, disk_capacity=10)
+    cache.put_many(["a", "b", "c"], vectors(3))
+    cache.flush()
+    cache.close()
+
+    reopened = EmbeddingCache(dim=4, max_items=10, disk_path=path, disk_capacity=10)
+    a, b, c = reopened.get_many(["a", "b", "c"])
+    np.testing.assert_array_equal(a, vectors(3)[0])
+    np.testing.assert_array_equal(b, vectors(3)[1])
+    np.testing.assert_array_equal(c, vectors(3)[2])
+    assert reopened.stats()["disk_hits"] == 3
+
+
+def test_disk_tier_resets_when_dimension_changes(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    cache.put_many(["a"], vectors(1))
+    cache.close()
+
+    reopened = EmbeddingCache(dim=8, disk_path=path, disk_capacity=10)
+    assert reopened.get_many(["a"]) == [None]
+    assert reopened.stats()["disk_items"] == 0
+
+
+def test_disk_tier_resets_when_capacity_changes(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    cache.put_many(["a"], vectors(1))
+    cache.close()
+
+    reopened = EmbeddingCache(dim=4, disk_path=path, disk_capacity=20)
+    assert reopened.stats()["disk_items"] == 0
+
+
+def test_disk_tier_stops_admitting_when_full(tmp_path):
+    cache = EmbeddingCache(dim=4, disk_path=str(tmp_path / "emb"), disk_capacity=2)
+    cache.put_many(["a", "b", "c"], vectors(3))
+    assert cache.stats()["disk_items"] == 2
+
+
+def test_second_process_opens_disk_tier_read_only(tmp_path):
+    path = str(tmp_path / "emb")
+    owner = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    owner.put_many(["a"], vectors(1))
+
+    # A second open file description cannot take the lock, as in another worker
+    other = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    assert owner.disk_writable
+    assert not other.disk_writable
+    np.testing.assert_array_equal(other.get_many(["a"])[0], vectors(1)[0])
+
+    other.put_many(["b"], vectors(2)[1:])
+    assert other.stats()["disk_items"] == 1
+    with open(f"{path}.idx") as f:
+        assert f.read().split() == ["a"]
+
+
+def test_torn_index_line_is_dropped(tmp_path):
+    path = str(tmp_path / "emb")
+    cache = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    cache.put_many(["a"], vectors(1))
+    cache.close()
+    with open(f"{path}.idx", "a") as f:
+        f.write("partial")
+
+    reopened = EmbeddingCache(dim=4, disk_path=path, disk_capacity=10)
+    reopened.put_many(["b"], vectors(2)[1:])
+    with open(f"{path}.idx") as f:
+        assert f.read().split() == ["a", "b"]
@@ -0,0 +1,107 @@
+import threading
+import time
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pytest
+
+from embedding_service import EncoderServer, MicroBatcher, RemoteEncoder, load_authkey, parse_address
+
+
+class RecordingEncoder:
+    name = "recording"
+    dim = 2
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        self.started.set()
+        self.release.wait()
+        if "boom" in texts:
+            raise ValueError("boom")
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_calls_share_one_forward_pass():
+    inner = RecordingEncoder()
+    inner.release.clear()
+    batcher = MicroBatcher(inner, max_batch_size=64, max_wait=0.05)
+
+    # Hold the first batch so the following calls queue up behind it
+    first = threading.Thread(target=batcher.encode, args=(["warm"],))
+    first.start()
+    inner.started.wait(1)
+    outputs = {}
+    threads = [threading.Thread(target=lambda t=text: outputs.__setitem__(t, batcher.encode([t, t + t])))
+               for text in ("a", "bb", "ccc")]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 1
+    while batcher.stats()["queued"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    inner.release.set()
+    for thread in threads + [first]:
+        thread.join(1)
+
+    assert len(inner.calls) == 2
+    assert sorted(inner.calls[1]) == sorted(["a", "aa", "bb", "bbbb", "ccc", "cccccc"])
+    assert outputs["bb"][:, 0].tolist() == [2, 4]
+    assert batcher.stats()["batches"] == 2
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    batcher = MicroBatcher(RecordingEncoder(), max_wait=0.0)
+    with pytest.raises(ValueError):
+        batcher.encode(["boom"])
+    assert batcher.encode(["ok"]).shape == (1, 2)
+
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:7600") == ("127.0.0.1", 7600)
+    assert parse_address("/tmp/encoder.sock") == "/tmp/encoder.sock"
+
+
+AUTHKEY = b"0123456789abcdef-test"
+
+
+def test_authkey_is_required(tmp_path, monkeypatch):
+    monkeypatch.delenv("EMBED_SERVICE_AUTHKEY", raising=False)
+    with pytest.raises(ValueError):
+        load_authkey()
+    monkeypatch.setenv("EMBED_SERVICE_AUTHKEY", "short")
+    with pytest.raises(ValueError):
+        load_authkey()
+    monkeypatch.setenv("EMBED_SERVICE_AUTHKEY", AUTHKEY.decode())
+    assert load_authkey() == AUTHKEY
+    with pytest.raises(ValueError):
+        EncoderServer(RecordingEncoder(), str(tmp_path / "encoder.sock"), authkey=b"")
+
+
+def test_clients_with_the_wrong_key_are_refused(tmp_path):
+    address = str(tmp_path / "encoder.sock")
+    server = EncoderServer(MicroBatcher(RecordingEncoder(), max_wait=0.0), address, authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(AuthenticationError):
+            RemoteEncoder(address, authkey=b"not-the-right-secret")
+    finally:
+        server.close()
+
+
+def test_remote_encoder_round_trip(tmp_path):
+    address = str(tmp_path / "encoder.sock")
+    server = EncoderServer(MicroBatcher(RecordingEncoder(), max_wait=0.0), address, authkey=AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        remote = RemoteEncoder(address, authkey=AUTHKEY)
+        assert (remote.name, remote.dim) == ("recording", 2)
+        assert remote.encode(["abc"]).tolist() == [[3.0, 1.0]]
+        with pytest.raises(RuntimeError):
+            remote.encode(["boom"])
+    finally:
+        server.close()
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from fanout import ERROR, OK, TIMEOUT, FanoutEngine
+
+
+def fail():
+    raise ValueError("upstream broke")
+
+
+def sleep_then(seconds, value=None):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+@pytest.fixture
+def engine():
+    return FanoutEngine(max_workers=8, per_task_limit=2)
+
+
+def test_run_reports_ok_error_and_timeout(engine):
+    tasks = {
+        "fast": lambda: 1,
+        "broken": fail,
+        "slow": sleep_then(1.0),
+        "late": sleep_then(0.3, 2),
+    }
+    started = time.monotonic()
+    results, statuses = engine.run(tasks, budget=0.5, deadlines={"late": 0.1})
+
+    assert time.monotonic() - started < 0.9
+    assert results == {"fast": 1}
+    assert statuses == {"fast": OK, "broken": ERROR, "slow": TIMEOUT, "late": TIMEOUT}
+
+
+def test_run_with_no_tasks(engine):
+    assert engine.run({}, budget=1) == ({}, {})
+
+
+def test_stream_yields_in_completion_order_then_timeouts(engine):
+    tasks = {
+        "slow": sleep_then(1.0),
+        "medium": sleep_then(0.2, "m"),
+        "fast": lambda: "f",
+        "broken": fail,
+    }
+    events = list(engine.stream(tasks, budget=0.5))
+
+    assert events[-1] == ("slow", TIMEOUT, None)
+    assert ("medium", OK, "m") in events
+    assert ("fast", OK, "f") in events
+    assert ("broken", ERROR, None) in events
+    assert events.index(("fast", OK, "f")) < events.index(("medium", OK, "m"))
+
+
+def test_stream_marks_deadline_misses(engine):
+    events = list(engine.stream({"late": sleep_then(0.5)}, budget=1.0, deadlines={"late": 0.1}))
+    assert events == [("late", TIMEOUT, None)]
+
+
+def test_hung_source_cannot_starve_other_sources():
+    engine = FanoutEngine(max_workers=4, per_task_limit=2)
+    release = threading.Event()
+
+    # Several requests leave calls to a dead source running after giving up on them
+    for _ in range(3):
+        _, statuses = engine.run({"dead": release.wait}, budget=0.05)
+        assert statuses == {"dead": TIMEOUT}
+
+    results, statuses = engine.run({"dead": release.wait, "healthy": lambda: "ok"}, budget=0.5)
+    assert statuses == {"dead": TIMEOUT, "healthy": OK}
+    assert results == {"healthy": "ok"}
+    release.set()
+
+
+def test_slot_is_freed_when_abandoned_call_finishes():
+    engine = FanoutEngine(max_workers=2, per_task_limit=1)
+    _, statuses = engine.run({"source": sleep_then(0.2)}, budget=0.05)
+    assert statuses == {"source": TIMEOUT}
+
+    time.sleep(0.3)
+    results, statuses = engine.run({"source": lambda: "again"}, budget=0.5)
+    assert results == {"source": "again"}
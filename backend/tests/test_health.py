@@ -0,0 +1,64 @@
+import time
+
+from health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, HealthRegistry
+
+
+def breaker(**settings):
+    options = dict(window=60.0, min_calls=4, failure_rate=0.5, cooldown=0.05, max_cooldown=1.0)
+    options.update(settings)
+    return CircuitBreaker("test", **options)
+
+
+def test_opens_only_after_enough_failures():
+    b = breaker()
+    for _ in range(3):
+        b.record(False, 0.1)
+    assert b.state == CLOSED  # below min_calls
+    b.record(False, 0.1)
+    assert b.state == OPEN
+    assert not b.allow()
+
+
+def test_half_open_probe_closes_on_success():
+    b = breaker()
+    for _ in range(4):
+        b.record(False, 0.1)
+    time.sleep(0.06)
+    assert b.allow()
+    assert b.state == HALF_OPEN
+    assert not b.allow()  # only one probe at a time
+    b.record(True, 0.1)
+    assert b.state == CLOSED
+    assert b.allow()
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    b = breaker()
+    for _ in range(4):
+        b.record(False, 0.1)
+    time.sleep(0.06)
+    assert b.allow()
+    b.record(False, 0.1)
+    assert b.state == OPEN
+    assert b.cooldown == 0.1
+    time.sleep(0.06)
+    assert not b.allow()
+
+
+def test_healthy_mix_stays_closed_and_reports_percentiles():
+    b = breaker()
+    for i in range(10):
+        b.record(i % 4 != 0, 0.01 * (i + 1))
+    snapshot = b.snapshot()
+    assert snapshot["state"] == CLOSED
+    assert snapshot["error_rate"] == 0.3
+    assert snapshot["latency_p50_ms"] == 60.0
+
+
+def test_registry_is_bounded():
+    registry = HealthRegistry(max_items=2, min_calls=1, cooldown=30.0)
+    registry.record("a", False, 0.1)
+    assert not registry.allow("a")
+    registry.get("b")
+    registry.get("c")
+    assert sorted(registry.snapshot()) == ["b", "c"]
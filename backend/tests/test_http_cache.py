@@ -0,0 +1,136 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_pool
+from http_cache import HTTPCache, cache_key
+
+
+class Handler(BaseHTTPRequestHandler):
+    calls = []
+
+    def do_GET(self):
+        Handler.calls.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        body = b'{"items": [1, 2, 3]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path.startswith("/private"):
+            self.send_header("Cache-Control", "no-store")
+        else:
+            self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_response(body, headers=None, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    Handler.calls = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setitem(http_pool.SOURCE_POLICIES, "cached", {"cache_ttl": 60.0})
+    http_pool._policies.pop("cached", None)
+    cache = HTTPCache(str(tmp_path / "http.sqlite"))
+    http_pool.enable_response_cache(cache)
+    yield f"http://127.0.0.1:{httpd.server_port}", cache
+    http_pool.enable_response_cache(None)
+    cache.close()
+    httpd.shutdown()
+    http_pool._policies.pop("cached", None)
+
+
+def test_cache_key_ignores_parameter_order_and_hides_the_url():
+    key = cache_key("https://api.example.org/search?b=2&a=1", {"key": "secret"})
+    assert key == cache_key("https://API.example.org/search", {"a": 1, "key": "secret", "b": "2"})
+    assert key != cache_key("https://api.example.org/search", {"a": 1, "b": 3, "key": "secret"})
+    assert "secret" not in key
+
+
+def test_fresh_hits_skip_the_network(server):
+    base, cache = server
+    first = http_pool.http_get("cached", f"{base}/search", params={"q": "a"})
+    second = http_pool.http_get("cached", f"{base}/search", params={"q": "a"})
+    assert first.json() == second.json() == {"items": [1, 2, 3]}
+    assert getattr(second, "from_cache", False)
+    assert len(Handler.calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entries_are_revalidated_with_their_etag(server):
+    base, cache = server
+    http_pool.http_get("cached", f"{base}/search")
+    cache._db.execute("UPDATE responses SET expires_at = 0")
+    response = http_pool.http_get("cached", f"{base}/search")
+    assert Handler.calls == [("/search", None), ("/search", '"v1"')]
+    assert response.status_code == 200 and response.json() == {"items": [1, 2, 3]}
+    assert cache.stats()["revalidated"] == 1
+    assert cache.stats()["stale_hits"] == 1
+    # The 304 renewed the entry, so the next call stays local
+    http_pool.http_get("cached", f"{base}/search")
+    assert len(Handler.calls) == 2
+
+
+def test_no_store_responses_and_uncached_sources_go_to_the_network(server):
+    base, cache = server
+    http_pool.http_get("cached", f"{base}/private")
+    http_pool.http_get("cached", f"{base}/private")
+    http_pool.http_get("web", f"{base}/search")
+    http_pool.http_get("web", f"{base}/search")
+    assert len(Handler.calls) == 4
+    assert cache.stats()["items"] == 0
+
+
+def test_least_recently_used_bodies_are_evicted(tmp_path):
+    cache = HTTPCache(str(tmp_path / "http.sqlite"), max_bytes=250)
+    for name in ("a", "b", "c"):
+        cache.store(name, make_response(b"x" * 100), 60)
+        if name == "b":
+            cache.get("a")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 200
+    cache.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "http.sqlite")
+    cache = HTTPCache(path)
+    cache.store("k", make_response(b"body", {"ETag": '"e"', "Cache-Control": "no-cache"}), 60)
+    cache.close()
+    entry = HTTPCache(path).get("k")
+    assert entry.body == b"body"
+    assert not entry.fresh
+    assert entry.validators == {"If-None-Match": '"e"'}
+
+
+def test_parsed_bodies_are_reused_and_copied(server):
+    base, _ = server
+    parses = []
+
+    def parse(response):
+        parses.append(response.url)
+        return response.json()["items"]
+
+    first = http_pool.http_get_parsed("cached", f"{base}/search", parse)
+    first.append(4)
+    second = http_pool.http_get_parsed("cached", f"{base}/search", parse)
+    assert second == [1, 2, 3]
+    assert len(parses) == 1
@@ -0,0 +1,130 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_pool
+from health import HealthRegistry
+
+
+class Handler(BaseHTTPRequestHandler):
+    calls = []
+
+    def do_GET(self):
+        Handler.calls.append(self.path)
+        if self.path == "/slow":
+            time.sleep(2)
+        status = 503 if self.path == "/flaky" and Handler.calls.count("/flaky") == 1 else 200
+        if self.path == "/down":
+            status = 503
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    Handler.calls = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    monkeypatch.setitem(http_pool.SOURCE_POLICIES, "test", {
+        "read_timeout": 0.5, "max_retries": 2, "backoff_factor": 0.05, "deadline": 1.0,
+    })
+    http_pool._policies.pop("test", None)
+    http_pool._buckets.pop("test", None)
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    http_pool._policies.pop("test", None)
+    http_pool._buckets.pop("test", None)
+
+
+def test_retries_retryable_status(server):
+    response = http_pool.http_get("test", f"{server}/flaky")
+    assert response.status_code == 200
+    assert Handler.calls == ["/flaky", "/flaky"]
+
+
+def test_returns_last_response_when_retries_run_out(server):
+    response = http_pool.http_get("test", f"{server}/down")
+    assert response.status_code == 503
+    assert Handler.calls == ["/down"] * 3
+
+
+def test_read_timeout_is_not_retried(server):
+    started = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        http_pool.http_get("test", f"{server}/slow")
+    assert time.monotonic() - started < 1.0
+    assert Handler.calls == ["/slow"]
+
+
+def test_deadline_scope_caps_the_call(server):
+    started = time.monotonic()
+    with http_pool.deadline_scope(0.2):
+        with pytest.raises(requests.Timeout):
+            http_pool.http_get("test", f"{server}/slow")
+        assert http_pool.remaining_time() <= 0.2
+    assert time.monotonic() - started < 0.5
+    assert http_pool.remaining_time() is None
+
+
+def test_expired_scope_skips_the_request(server):
+    with http_pool.deadline_scope(0):
+        with pytest.raises(requests.Timeout):
+            http_pool.http_get("test", f"{server}/flaky")
+    assert Handler.calls == []
+
+
+def test_failing_upstream_trips_its_circuit(server, monkeypatch):
+    monkeypatch.setattr(http_pool, "upstream_health", HealthRegistry(min_calls=2, cooldown=30.0))
+    for _ in range(2):
+        assert http_pool.http_get("test", f"{server}/down").status_code == 503
+    calls = len(Handler.calls)
+    with pytest.raises(http_pool.CircuitOpenError):
+        http_pool.http_get("test", f"{server}/flaky")
+    assert len(Handler.calls) == calls
+
+
+def test_upstream_failures_counts_this_threads_failed_calls(server, monkeypatch):
+    monkeypatch.setattr(http_pool, "upstream_health", HealthRegistry(min_calls=3, cooldown=30.0))
+    before = http_pool.upstream_failures()
+    http_pool.http_get("test", f"{server}/ok")
+    assert http_pool.upstream_failures() == before
+    for _ in range(2):
+        http_pool.http_get("test", f"{server}/down")
+    with pytest.raises(http_pool.CircuitOpenError):
+        http_pool.http_get("test", f"{server}/down")
+    assert http_pool.upstream_failures() == before + 3
+    # Other threads keep their own count
+    counts = []
+    worker = threading.Thread(target=lambda: counts.append(http_pool.upstream_failures()))
+    worker.start()
+    worker.join()
+    assert counts == [0]
+
+
+def test_token_bucket_spaces_requests_after_a_burst():
+    bucket = http_pool.TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+    assert bucket.acquire() and bucket.acquire()
+    assert time.monotonic() - started < 0.02
+    assert bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+    assert not bucket.acquire(timeout=0.01)
+
+
+def test_rate_limit_is_shared_and_bounded_by_the_deadline(server, monkeypatch):
+    monkeypatch.setenv("TEST_HTTP_RATE_LIMIT", "1")
+    monkeypatch.setenv("TEST_HTTP_BURST", "1")
+    http_pool._policies.pop("test", None)
+    assert http_pool.http_get("test", f"{server}/first").status_code == 200
+    with http_pool.deadline_scope(0.2):
+        with pytest.raises(http_pool.RateLimitedError):
+            http_pool.http_get("test", f"{server}/second")
+    assert Handler.calls == ["/first"]
@@ -0,0 +1,29 @@
+from lexical import bm25_scores, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("What is the Rust borrow-checker?") == ["rust", "borrow", "checker"]
+    assert tokenize(None) == []
+
+
+def test_rare_exact_matches_outrank_common_terms():
+    documents = [
+        "python tutorial for beginners",
+        "python asyncio event loop internals",
+        "python packaging guide",
+        "cooking pasta at home",
+    ]
+    scores = bm25_scores("python asyncio", documents)
+    assert scores.argmax() == 1
+    assert scores[3] == 0
+    assert scores[0] == scores[2] > 0
+
+
+def test_longer_documents_are_normalized():
+    scores = bm25_scores("rome", ["rome empire", "rome " + "filler words here " * 20])
+    assert scores[0] > scores[1]
+
+
+def test_no_query_terms_scores_zero():
+    assert bm25_scores("the of", ["the of the"]).tolist() == [0.0]
+    assert len(bm25_scores("rome", [])) == 0
@@ -0,0 +1,42 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from load_test import parse_server_timing, run, summarize
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"source_status": {"web": "ok", "news": "timeout"}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Server-Timing", 'embed;dur=1.5, fanout;desc="sources";dur=20')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_parse_server_timing():
+    assert parse_server_timing('embed;dur=1.5, fanout;desc="x";dur=20, total') == {"embed": 1.5, "fanout": 20.0}
+
+
+def test_summarize_percentiles():
+    stats = summarize([float(n) for n in range(1, 101)])
+    assert (stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]) == (51.0, 96.0, 100.0)
+    assert summarize([])["p50_ms"] is None
+
+
+def test_run_reports_latency_stages_and_source_statuses():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        report = run(f"http://127.0.0.1:{httpd.server_port}", "/search", ["a", "b"], concurrency=4, total=20,
+                     timeout=5, cache_bust=True, params={})
+    finally:
+        httpd.shutdown()
+    assert report["requests"] == 20
+    assert report["http_statuses"] == {200: 20}
+    assert report["stages"]["fanout"]["p50_ms"] == 20.0
+    assert report["source_statuses"]["news"] == {"timeout": 20}
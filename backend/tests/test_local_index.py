@@ -0,0 +1,49 @@
+import numpy as np
+
+from local_index import LocalIndex
+
+
+def result(n):
+    return {"title": f"doc {n}", "snippet": "", "url": f"https://example.com/{n}"}
+
+
+def test_search_returns_most_similar_first(tmp_path):
+    index = LocalIndex(dim=4, path=str(tmp_path / "idx"), capacity=10)
+    index.add([result(i) for i in range(4)], np.eye(4, dtype=np.float32))
+
+    query = np.array([0.1, 0.0, 0.9, 0.4], dtype=np.float32)
+    hits = index.search(query, k=2)
+    assert [hit["url"] for hit in hits] == ["https://example.com/2", "https://example.com/3"]
+    assert hits[0]["relevance"] > hits[1]["relevance"]
+
+
+def test_min_score_and_duplicate_urls(tmp_path):
+    index = LocalIndex(dim=4, path=str(tmp_path / "idx"), capacity=10)
+    assert index.add([result(0), result(0)], np.eye(2, 4, dtype=np.float32)) == 1
+
+    assert index.search(np.array([0, 1, 0, 0], dtype=np.float32), k=5, min_score=0.5) == []
+
+
+def test_survives_restart_and_stops_at_capacity(tmp_path):
+    path = str(tmp_path / "idx")
+    index = LocalIndex(dim=4, path=path, capacity=3)
+    assert index.add([result(i) for i in range(4)], np.eye(4, dtype=np.float32)) == 3
+    index.close()
+
+    reopened = LocalIndex(dim=4, path=path, capacity=3)
+    assert reopened.stats()["documents"] == 3
+    hits = reopened.search(np.array([0, 1, 0, 0], dtype=np.float32), k=1)
+    assert hits[0]["url"] == "https://example.com/1"
+
+
+def test_reader_sees_rows_added_by_the_writer(tmp_path):
+    path = str(tmp_path / "idx")
+    writer = LocalIndex(dim=4, path=path, capacity=10)
+    writer.add([result(0)], np.eye(1, 4, dtype=np.float32))
+    reader = LocalIndex(dim=4, path=path, capacity=10)
+    assert not reader.writable
+
+    writer.add([result(1)], np.eye(4, dtype=np.float32)[1:2])
+    hits = reader.search(np.array([0, 1, 0, 0], dtype=np.float32), k=1)
+    assert hits[0]["url"] == "https://example.com/1"
+    assert reader.add([result(2)], np.eye(1, 4, dtype=np.float32)) == 0
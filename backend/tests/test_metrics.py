@@ -0,0 +1,55 @@
+import time
+
+import http_pool
+from metrics import Registry, StageTimings
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="embed")
+    histogram.observe(0.5, stage="embed")
+    histogram.observe(5.0, stage="embed")
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{stage="embed",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="embed",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{stage="embed",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{stage="embed"} 5.550000' in lines
+    assert 'latency_seconds_count{stage="embed"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    registry = Registry()
+    counter = registry.counter("outcomes_total", "Outcomes", ["source", "status"])
+    counter.inc(source="web", status='say "hi"')
+    counter.inc(source="web", status='say "hi"')
+    assert 'outcomes_total{source="web",status="say \\"hi\\""} 2' in registry.render().splitlines()
+
+
+def test_stage_timings_accumulate_into_server_timing():
+    timings = StageTimings()
+    timings.add("score", 0.002)
+    timings.add("score", 0.003)
+    with timings.stage("embed"):
+        pass
+    timings.add_source("web", 0.1, 0.01)
+    header = timings.server_timing()
+    assert header.startswith("score;dur=5.0, embed;dur=")
+    assert "web-network;dur=100.0, web-parse;dur=10.0" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    assert timings.as_dict()["sources"] == {"web": {"network": 100.0, "parse": 10.0}}
+
+
+def test_network_time_counts_time_spent_in_requests(monkeypatch):
+    def slow_request(*args, **kwargs):
+        time.sleep(0.05)
+        raise http_pool.requests.ConnectionError("refused")
+
+    monkeypatch.setattr(http_pool, "_request", slow_request)
+    before = http_pool.network_time()
+    try:
+        http_pool.request("web", "GET", "http://example.invalid/")
+    except http_pool.requests.RequestException:
+        pass
+    assert http_pool.network_time() - before >= 0.05
@@ -0,0 +1,54 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from mock_upstreams import fixture_path, make_server, parse_overrides
+
+
+@pytest.fixture
+def mock(tmp_path):
+    server = make_server(port=0, fixtures=str(tmp_path), behaviour={"*": {"latency_ms": 0, "jitter_ms": 0}})
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", tmp_path
+    server.shutdown()
+
+
+def test_serves_each_upstream_in_its_format(mock):
+    base, _ = mock
+    wiki = requests.get(f"{base}/w/api.php", params={"srsearch": "rome"}).json()
+    assert len(wiki["query"]["search"]) == 10
+    assert "<entry>" in requests.get(f"{base}/api/query", params={"search_query": "all:rome"}).text
+    assert requests.get(f"{base}/v2/everything", params={"q": "rome"}).json()["status"] == "ok"
+    assert requests.post(f"{base}/html/", data={"q": "rome"}).text.count('class="result"') == 10
+    assert "<article>" in requests.get(f"{base}/page/rome-web-0").text
+
+
+def test_synthetic_responses_are_deterministic(mock):
+    base, _ = mock
+    first = requests.get(f"{base}/search.json", params={"q": "rome"}).json()
+    assert requests.get(f"{base}/search.json", params={"q": "rome"}).json() == first
+
+
+def test_replays_recorded_fixtures(mock):
+    base, fixtures = mock
+    (fixtures / "news").mkdir()
+    with open(fixture_path(str(fixtures), "news", "Rome"), "w") as f:
+        json.dump({"status": 200, "content_type": "application/json", "body": '{"status": "recorded"}'}, f)
+    assert requests.get(f"{base}/v2/everything", params={"q": "rome"}).json() == {"status": "recorded"}
+
+
+def test_failure_injection_can_change_at_runtime(mock):
+    base, _ = mock
+    requests.post(f"{base}/_mock/config", json={"news": {"failure_rate": 1}})
+    assert requests.get(f"{base}/v2/everything", params={"q": "rome"}).status_code == 503
+    assert requests.get(f"{base}/search.json", params={"q": "rome"}).status_code == 200
+    counts = requests.get(f"{base}/_mock/config").json()["counts"]
+    assert counts["news"] == {"failure": 1}
+
+
+def test_parse_overrides():
+    assert parse_overrides(["news.hang_rate=0.5", "*.latency_ms=20"]) == {"news": {"hang_rate": 0.5}, "*": {"latency_ms": 20.0}}
+    with pytest.raises(ValueError):
+        parse_overrides(["news.speed=1"])
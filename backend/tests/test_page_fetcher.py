@@ -0,0 +1,87 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_pool
+from page_fetcher import PageFetcher, extract_text
+
+PAGE = b"""<html><head><script>var x = 1;</script></head><body>
+<nav>Menu</nav><article><h1>Title</h1><p>Main   text.</p></article><footer>Footer</footer>
+</body></html>"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with Handler.lock:
+            Handler.active += 1
+            Handler.peak = max(Handler.peak, Handler.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.2)
+            content_type = {"/pdf": "application/pdf", "/plain": "text/plain; charset=utf-8"}.get(
+                self.path, "text/html; charset=utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.end_headers()
+            if self.path == "/huge":
+                # Never-ending body: the fetcher has to stop at its byte cap
+                try:
+                    while True:
+                        self.wfile.write(b"<p>" + b"x" * 4096 + b"</p>")
+                except OSError:
+                    return
+            self.wfile.write(b"plain   words" if self.path == "/plain" else PAGE)
+        finally:
+            with Handler.lock:
+                Handler.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.active = Handler.peak = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    http_pool._policies.pop("pages", None)
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_extract_text_prefers_main_content():
+    assert extract_text(PAGE.decode()) == "Title Main text."
+
+
+def test_fetches_text_and_skips_other_content_types(server):
+    fetcher = PageFetcher()
+    pages = fetcher.fetch_many([f"{server}/page", f"{server}/plain", f"{server}/pdf"], budget=2.0)
+    assert pages == {f"{server}/page": "Title Main text.", f"{server}/plain": "plain words"}
+
+
+def test_stops_reading_at_the_byte_cap(server):
+    fetcher = PageFetcher(max_bytes=64 * 1024, max_chars=100000)
+    started = time.monotonic()
+    pages = fetcher.fetch_many([f"{server}/huge"], budget=2.0)
+    assert time.monotonic() - started < 1.5
+    assert 0 < len(pages[f"{server}/huge"]) <= 64 * 1024
+
+
+def test_limits_concurrency_per_host(server):
+    fetcher = PageFetcher(max_workers=8, per_host_limit=2)
+    pages = fetcher.fetch_many([f"{server}/slow{i}" for i in range(6)], budget=2.0)
+    assert len(pages) == 6
+    assert Handler.peak == 2
+
+
+def test_budget_drops_unfinished_pages(server):
+    fetcher = PageFetcher(max_workers=8, per_host_limit=1)
+    pages = fetcher.fetch_many([f"{server}/slow{i}" for i in range(4)], budget=0.3)
+    assert 1 <= len(pages) < 4
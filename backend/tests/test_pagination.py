@@ -0,0 +1,62 @@
+import time
+
+from pagination import SearchSessions, is_partial, parse_cursor
+
+
+def ranked(**counts):
+    return {source: [{"title": f"{source}-{i}"} for i in range(count)] for source, count in counts.items()}
+
+
+def titles(payload, source):
+    return [result["title"] for result in payload[source]]
+
+
+def test_parse_cursor():
+    assert parse_cursor("abc.def-gh.2") == ("abc.def-gh", 2)
+    assert parse_cursor("abc.0") == ("abc", 0)
+    for malformed in ("", "abc", "abc.", ".2", "abc.-1", "abc.x"):
+        assert parse_cursor(malformed) is None
+
+
+def test_single_page_results_open_no_session():
+    sessions = SearchSessions(page_size=3)
+    results = ranked(web=3, wikipedia=1)
+    assert sessions.open("q", results, {"web": "ok"}, False) is None
+    payload = sessions.page_payload("q", results, 0)
+    assert titles(payload, "web") == ["web-0", "web-1", "web-2"]
+    assert payload["next_cursor"] is None
+
+
+def test_pages_follow_the_ranking_without_overlap():
+    sessions = SearchSessions(page_size=2)
+    results = ranked(web=5, wikipedia=3)
+    session_id = sessions.open("q", results, {"web": "ok", "wikipedia": "cached"}, False)
+    first = sessions.page_payload("q", results, 0, session_id)
+    assert titles(first, "web") == ["web-0", "web-1"]
+
+    second = sessions.session_page(first["next_cursor"])
+    assert titles(second, "web") == ["web-2", "web-3"]
+    assert titles(second, "wikipedia") == ["wikipedia-2"]
+    assert second["query"] == "q" and second["partial"] is False and second["degraded"] is False
+
+    last = sessions.session_page(second["next_cursor"])
+    assert titles(last, "web") == ["web-4"]
+    assert last["wikipedia"] == []
+    assert last["next_cursor"] is None
+
+
+def test_expired_or_unknown_sessions_give_no_page():
+    sessions = SearchSessions(page_size=1, ttl=0.05)
+    session_id = sessions.open("q", ranked(web=3), {"web": "timeout"}, True)
+    page = sessions.session_page(f"{session_id}.1")
+    assert page["partial"] is True and page["degraded"] is True
+    assert sessions.session_page("unknown.1") is None
+    assert sessions.session_page("not-a-cursor") is None
+    time.sleep(0.1)
+    # /search answers 410 for these
+    assert sessions.session_page(f"{session_id}.1") is None
+
+
+def test_is_partial():
+    assert not is_partial({"web": "ok", "news": "cached"})
+    assert is_partial({"web": "ok", "news": "error"})
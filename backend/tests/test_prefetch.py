@@ -0,0 +1,55 @@
+import pytest
+
+import prefetch
+from prefetch import DecayingCounter, Prefetcher
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prefetch.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_counts_halve_every_half_life(clock):
+    counter = DecayingCounter(half_life=10)
+    for _ in range(4):
+        counter.add("old")
+    clock[0] += 20
+    counter.add("new")
+    counter.add("new")
+    assert counter.count("old") == pytest.approx(1.0)
+    assert counter.top(1) == [("new", pytest.approx(2.0))]
+    assert [key for key, _ in counter.top(5, min_count=1.5)] == ["new"]
+
+
+def test_weakest_keys_are_dropped_past_capacity(clock):
+    counter = DecayingCounter(max_items=2)
+    counter.add("a", 3)
+    counter.add("b", 1)
+    counter.add("c", 2)
+    assert sorted(key for key, _ in counter.top(5)) == ["a", "c"]
+
+
+def test_refreshes_popular_due_queries_within_budget(clock):
+    refreshed = []
+    due = {"rome": ["news", "web"], "paris": ["news", "web"], "rare": ["news"]}
+    prefetcher = Prefetcher(due=lambda q: due[q], refresh=lambda q, sources: refreshed.append((q, sources)),
+                            min_count=2, budget=3, min_gap=60)
+    for query, times in (("rome", 5), ("paris", 3), ("rare", 1)):
+        for _ in range(times):
+            prefetcher.record(query)
+
+    assert prefetcher.run_once() == 3
+    assert refreshed == [("rome", ["news", "web"]), ("paris", ["news"])]
+    # Sources just refreshed wait out the gap; the rest of the work carries over
+    assert prefetcher.run_once() == 1
+    assert refreshed[-1] == ("paris", ["web"])
+    clock[0] += 61
+    assert prefetcher.run_once() == 3
+
+
+def test_paused_cycles_do_nothing(clock):
+    prefetcher = Prefetcher(due=lambda q: ["web"], refresh=lambda q, s: None, paused=lambda: True, min_count=0)
+    prefetcher.record("rome")
+    assert prefetcher.run_once() == 0
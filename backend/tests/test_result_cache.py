@@ -0,0 +1,82 @@
+import pytest
+
+import result_cache
+from result_cache import FRESH, MISS, STALE, ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_goes_fresh_then_stale_then_miss(clock):
+    cache = ResultCache(stale_ttl=30)
+    cache.set("q", ["result"], ttl=10)
+
+    assert cache.get("q") == (["result"], FRESH)
+    clock[0] += 10
+    assert cache.get("q") == (["result"], STALE)
+    clock[0] += 29
+    assert cache.get("q") == (["result"], STALE)
+    clock[0] += 1
+    assert cache.get("q") == (None, MISS)
+    assert cache.stats()["items"] == 0
+
+
+def test_entries_keep_their_own_ttl(clock):
+    cache = ResultCache(stale_ttl=0)
+    cache.set("news", 1, ttl=5)
+    cache.set("wikipedia", 2, ttl=500)
+    clock[0] += 10
+
+    assert cache.get("news") == (None, MISS)
+    assert cache.get("wikipedia") == (2, FRESH)
+
+
+def test_evicts_least_recently_used(clock):
+    cache = ResultCache(max_items=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")  # "a" is now more recent than "b"
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") == (None, MISS)
+    assert cache.get("a") == (1, FRESH)
+    assert cache.get("c") == (3, FRESH)
+
+
+def test_only_one_refresh_per_key():
+    cache = ResultCache()
+    assert cache.start_refresh("q")
+    assert not cache.start_refresh("q")
+    assert cache.start_refresh("other")
+
+    cache.end_refresh("q")
+    assert cache.start_refresh("q")
+
+
+def test_counts_hits_stale_hits_and_misses(clock):
+    cache = ResultCache(stale_ttl=60)
+    cache.set("q", 1, ttl=10)
+    cache.get("q")
+    clock[0] += 20
+    cache.get("q")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_ttl_remaining_peeks_without_counting(clock):
+    cache = ResultCache(stale_ttl=30)
+    cache.set("q", 1, ttl=10)
+    clock[0] += 4
+    assert cache.ttl_remaining("q") == 6
+    clock[0] += 20
+    assert cache.ttl_remaining("q") == -14
+    clock[0] += 20
+    assert cache.ttl_remaining("q") is None
+    assert cache.ttl_remaining("other") is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
@@ -0,0 +1,44 @@
+import gzip
+import json
+
+import serialization
+from serialization import choose_encoding, compress, dumps, parse_fields, shape_payload
+
+
+def test_parse_fields():
+    assert parse_fields("title, url,,") == {"title", "url"}
+    assert parse_fields(["title", 3]) == {"title"}
+    assert parse_fields("") is None and parse_fields(None) is None
+
+
+def test_shape_payload_projects_and_rounds_without_touching_the_input():
+    result = {"title": "Rome", "url": "u", "content": "long text", "relevance": 0.123456789}
+    payload = {"query": "rome", "web": [result], "source_status": {"web": "ok"}}
+    shaped = shape_payload(payload, ["web", "news"], {"title", "relevance"}, 3)
+    assert shaped == {"query": "rome", "web": [{"title": "Rome", "relevance": 0.123}], "source_status": {"web": "ok"}}
+    assert payload["web"][0] is result and "content" in result
+    assert shape_payload(payload, ["web"], None, 2)["web"][0]["content"] == "long text"
+
+
+def test_dumps_is_compact_json():
+    body = dumps({"title": "Zürich", "relevance": 0.5})
+    assert b" " not in body
+    assert json.loads(body) == {"title": "Zürich", "relevance": 0.5}
+
+
+def test_choose_encoding_prefers_the_highest_quality(monkeypatch):
+    monkeypatch.setattr(serialization, "ENCODINGS", ("br", "gzip"))
+    assert choose_encoding("br;q=0.1, gzip;q=1.0") == "gzip"
+    assert choose_encoding("gzip;q=0.5, br;q=0.8") == "br"
+    # Equal ratings fall back to our own preference order
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("*;q=0.3, gzip;q=0.2") == "br"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+
+
+def test_choose_encoding_honours_quality_values():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert gzip.decompress(compress(b"x" * 100, "gzip")) == b"x" * 100
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return {"answer": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("q", compute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flights.stats()["followers"] < 4:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "followers": 4}
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("upstream down")
+
+    errors = []
+
+    def follower():
+        started.wait(1)
+        try:
+            flights.do("q", lambda: "unused")
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=follower)
+    thread.start()
+    with pytest.raises(ValueError):
+        flights.do("q", fail)
+    thread.join()
+    assert len(errors) == 1
+    assert flights.do("q", lambda: "fresh") == ("fresh", False)
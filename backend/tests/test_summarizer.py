@@ -0,0 +1,28 @@
+import numpy as np
+
+from summarizer import mmr_select, split_sentences
+
+
+def test_split_sentences_drops_fragments_and_keeps_abbreviations():
+    text = "Intro. Rome was founded in 753 BC, e.g. by Romulus according to legend. " \
+           "It grew into an empire spanning the Mediterranean. " + "Then " + "more " * 100
+    sentences = split_sentences(text, min_chars=20, max_chars=100)
+    assert sentences[0] == "Rome was founded in 753 BC, e.g. by Romulus according to legend."
+    assert sentences[1] == "It grew into an empire spanning the Mediterranean."
+    assert len(sentences[2]) <= 103 and sentences[2].endswith("...")
+    assert split_sentences("") == []
+
+
+def test_mmr_prefers_diverse_sentences():
+    embeddings = np.array([[1.0, 0.0], [0.99, 0.141], [0.6, 0.8]], dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    relevance = np.array([0.9, 0.89, 0.7], dtype=np.float32)
+    # Pure relevance takes the near-duplicate, MMR takes the different sentence
+    assert mmr_select(relevance, embeddings, 2, diversity=0.0) == [0, 1]
+    assert mmr_select(relevance, embeddings, 2, diversity=0.5) == [0, 2]
+
+
+def test_mmr_handles_small_inputs():
+    embeddings = np.eye(2, dtype=np.float32)
+    assert mmr_select(np.array([0.1, 0.5], dtype=np.float32), embeddings, 5) == [1, 0]
+    assert mmr_select(np.empty(0, dtype=np.float32), np.empty((0, 2), dtype=np.float32), 3) == []
@@ -21,39 +21,59 @@ const SearchPage = () => {
         localStorage.setItem('darkMode', JSON.stringify(darkMode));
     }, [darkMode]);
 
-    const handleSearch = async () => {
+    const SOURCE_LABELS = {
+        web: 'Web',
+        wikipedia: 'Wikipedia',
+        arxiv: 'ArXiv',
+        news: 'News',
+        reddit: 'Reddit',
+        youtube: 'YouTube',
+        local: 'Saved'
+    };
+
+    const labelResults = (source, sourceResults) =>
+        (sourceResults || []).map(result => ({ ...result, source: SOURCE_LABELS[source] }));
+
+    const handleSearch = () => {
         if (!query.trim() || isSearching) return;
 
         setIsSearching(true);
         setError('');
+        setResults({});
+
+        // Stream each source as it completes, then replace everything with the re-ranked final frame
+        const events = new EventSource(`http://localhost:5000/search/stream?query=${encodeURIComponent(query)}`);
+        let finished = false;
 
-        try {
-            const response = await fetch(`http://localhost:5000/search?query=${encodeURIComponent(query)}`);
-            const data = await response.json();
-
-            if (data) {
-                const organizedResults = {
-                    web: (data.web || []).map(result => ({ ...result, source: 'Web' })),
-                    wikipedia: (data.wikipedia || []).map(result => ({ ...result, source: 'Wikipedia' })),
-                    arxiv: (data.arxiv || []).map(result => ({ ...result, source: 'ArXiv' })),
-                    news: (data.news || []).map(result => ({ ...result, source: 'News' })),
-                    reddit: (data.reddit || []).map(result => ({ ...result, source: 'Reddit' })),
-                    youtube: (data.youtube || []).map(result => ({ ...result, source: 'YouTube' }))
-                };
-                
-                setResults(organizedResults);
-                setSearchHistory((prevHistory) => [...new Set([query, ...prevHistory])]);
-                setHasSearched(true);
-            } else {
-                setResults({});
-            }
-        } catch (error) {
+        events.addEventListener('source', (event) => {
+            const data = JSON.parse(event.data);
+            if (!SOURCE_LABELS[data.source]) return;
+            setResults(prevResults => ({ ...prevResults, [data.source]: labelResults(data.source, data.results) }));
+            setHasSearched(true);
+        });
+
+        events.addEventListener('final', (event) => {
+            const data = JSON.parse(event.data);
+            const organizedResults = {};
+            Object.keys(SOURCE_LABELS).forEach(source => {
+                organizedResults[source] = labelResults(source, data[source]);
+            });
+
+            finished = true;
+            events.close();
+            setResults(organizedResults);
+            setSearchHistory((prevHistory) => [...new Set([query, ...prevHistory])]);
+            setHasSearched(true);
+            setIsSearching(false);
+        });
+
+        events.onerror = (error) => {
+            if (finished) return;
             console.error('Error fetching search results:', error);
+            events.close();
             setError('Failed to fetch results. Please try again later.');
-            setResults({});
-        }
-
-        setIsSearching(false);
+            setIsSearching(false);
+        };
     };
 
     const handleClearResults = () => {